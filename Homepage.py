@@ -1,4 +1,7 @@
 import streamlit as st
+import assets
+import career_model
+from model_registry import registry
 
 # Set page configuration
 st.set_page_config(
@@ -7,124 +10,21 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS inspired by the Tech Career Advisor design but with modifications
-st.markdown("""
-<style>
-    .main {
-        padding: 20px;
-    }
-    .title {
-        color: #20c997;
-        text-align: center;
-        font-size: calc(1.8rem + 1vw) !important;
-        margin-bottom: 20px;
-    }
-    .subtitle {
-        color: #495057;
-        text-align: center;
-        font-size: calc(1.2rem + 0.5vw) !important;
-        margin-bottom: 30px;
-    }
-    .feature-card {
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        margin: 10px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        height: 100%;
-    }
-    .cta-button {
-        text-align: center;
-        margin-top: 40px;
-        margin-bottom: 40px;
-    }
-    .footer {
-        text-align: center;
-        color: #6c757d;
-        padding-top: 50px;
-    }
-    .intro-text {
-        text-align: center; 
-        max-width: 800px; 
-        margin: 0 auto; 
-        padding: 20px;
-    }
-    .intro-text p {
-        font-size: 18px;
-    }
-    .process-step {
-        display: flex;
-        align-items: center;
-        margin-bottom: 20px;
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    .step-number {
-        background-color: #20c997;
-        color: white;
-        width: 50px;
-        height: 50px;
-        border-radius: 50%;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-size: 24px;
-        font-weight: bold;
-        margin-right: 20px;
-        flex-shrink: 0;
-    }
-    .step-content {
-        flex-grow: 1;
-    }
-    .step-title {
-        font-weight: bold;
-        color: #20c997;
-        font-size: 18px;
-        margin-bottom: 5px;
-    }
-    .career-category {
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        margin-bottom: 20px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-    }
-    .career-category-title {
-        color: #20c997;
-        font-weight: bold;
-        font-size: 20px;
-        margin-bottom: 15px;
-        border-bottom: 2px solid #e9ecef;
-        padding-bottom: 10px;
-    }
-    .career-item {
-        display: flex;
-        align-items: center;
-        margin-bottom: 10px;
-    }
-    .career-icon {
-        width: 30px;
-        text-align: center;
-        margin-right: 15px;
-        font-size: 20px;
-    }
-    .career-path-section {
-        margin-top: 40px;
-        margin-bottom: 40px;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Warm up the recommendation model in the background so the first
+# visit to the Recommendation page doesn't wait for it to load
+registry.warm_up(career_model.serving_path())
+
+# Shared stylesheet, served from static/ and cached by the browser
+assets.inject_styles('home')
 
 # Hero section
 st.markdown("<h1 class='title'>🎓 Career Recommendation System</h1>", unsafe_allow_html=True)
 st.markdown("<h2 class='subtitle'>Find Your Ideal Career Path Based on Elementary School Performance</h2>", unsafe_allow_html=True)
 
-# Main image - updated to a different image
+# Main image (bundled in static/)
 col1, col2, col3 = st.columns([1, 3, 1])
 with col2:
-    st.image("https://img.freepik.com/free-vector/choosing-best-career-way-flat-vector-illustration_82574-3471.jpg", use_container_width=True)
+    st.markdown(assets.image_html("hero.svg", "Choosing a career path", "hero"), unsafe_allow_html=True)
 
 # Introduction
 st.markdown("""
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import platform
+import time
+from functools import lru_cache
+from importlib import metadata
+
+ARTIFACT_DIR = os.environ.get('CAREER_ARTIFACT_DIR', 'artifacts')
+
+# Bump when the artifact layout or training code changes in a way the other
+# manifest fields don't capture
+ARTIFACT_FORMAT = 1
+
+# Libraries whose versions decide whether a pickled model can be reused
+TRACKED_LIBRARIES = ['scikit-learn', 'numpy', 'pandas', 'joblib']
+
+
+@lru_cache(maxsize=None)
+def library_versions():
+    versions = {'python': platform.python_version()}
+    for name in TRACKED_LIBRARIES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+# Everything that determines a trained model. Two manifests are equal exactly
+# when training would produce the same artifact, so the manifest's hash is used
+# as the artifact's name.
+def build_manifest(dataset_hash, features, hyperparameters, kind='model'):
+    return {
+        'format': ARTIFACT_FORMAT,
+        'kind': kind,
+        'dataset': {'sha256': dataset_hash},
+        'features': features,
+        'hyperparameters': hyperparameters,
+        'versions': dict(library_versions()),
+    }
+
+
+def manifest_key(manifest):
+    canonical = json.dumps(manifest, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+# Content-addressed location of the artifact described by manifest
+def artifact_path(manifest, suffix='.pkl', artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, f"{manifest['kind']}-{manifest_key(manifest)}{suffix}")
+
+
+def manifest_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+# Record the manifest next to a freshly written artifact
+def write_manifest(path, manifest):
+    record = {'key': manifest_key(manifest), 'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'manifest': manifest}
+    tmp_path = manifest_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path(path))
+
+
+def read_manifest(path):
+    with open(manifest_path(path)) as f:
+        return json.load(f)['manifest']
+
+
+# Log of the versions derived from a base artifact (e.g. by incremental updates),
+# oldest first. Each entry records at least the version's 'path'.
+def versions_path(base_path):
+    return os.path.splitext(base_path)[0] + '.versions.json'
+
+
+def read_versions(base_path):
+    if not os.path.exists(versions_path(base_path)):
+        return []
+    with open(versions_path(base_path)) as f:
+        return json.load(f)['versions']
+
+
+def append_version(base_path, entry):
+    versions = read_versions(base_path) + [entry]
+    tmp_path = versions_path(base_path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'base': base_path, 'versions': versions}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, versions_path(base_path))
+    return versions
+
+
+# Newest version of base_path whose artifact exists, or base_path itself
+def latest_version(base_path):
+    for entry in reversed(read_versions(base_path)):
+        if os.path.exists(entry['path']):
+            return entry['path']
+    return base_path
+
@@ -0,0 +1,147 @@
+import argparse
+import functools
+import hashlib
+import html
+import os
+import re
+import urllib.request
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Where Streamlit serves STATIC_DIR when server.enableStaticServing is on
+# (see .streamlit/config.toml); relative, so it also works under a base URL path
+STATIC_URL = 'app/static'
+
+STYLESHEET = 'style.css'
+MINIFIED_STYLESHEET = 'style.min.css'
+
+# Remote images the pages used to fetch on every view, and their local replacements
+# (only used by the page-weight report)
+REMOTE_IMAGES = {
+    'hero.svg': 'https://img.freepik.com/free-vector/choosing-best-career-way-flat-vector-illustration_82574-3471.jpg',
+    'logo.svg': 'https://img.icons8.com/ios-filled/100/20c997/graduation-cap.png',
+}
+
+
+def static_path(name):
+    return os.path.join(STATIC_DIR, name)
+
+
+# Strip comments and the whitespace around punctuation that doesn't need it
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+# Short content hash of a static file. It goes into the file's URL, so browsers
+# (or a proxy adding long Cache-Control lifetimes) can keep it until it changes.
+@functools.lru_cache(maxsize=None)
+def fingerprint(name):
+    with open(static_path(name), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_url(name):
+    return f"{STATIC_URL}/{name}?v={fingerprint(name)}"
+
+
+@functools.lru_cache(maxsize=None)
+def read_static(name):
+    with open(static_path(name), encoding='utf-8') as f:
+        return f.read()
+
+
+def static_serving():
+    import streamlit as st
+    return bool(st.get_option('server.enableStaticServing'))
+
+
+# The shared stylesheet: a link to the cached file when static serving is on,
+# otherwise the minified CSS inline
+def stylesheet_html():
+    if static_serving():
+        return f'<link rel="stylesheet" href="{static_url(MINIFIED_STYLESHEET)}">'
+    return f'<style>{read_static(MINIFIED_STYLESHEET)}</style>'
+
+
+# Apply the shared stylesheet to a page. page names the marker that page-specific
+# rules are scoped to (.stApp:has(.page-<page>)).
+def inject_styles(page):
+    import streamlit as st
+    st.markdown(f'{stylesheet_html()}<div class="page-{page}"></div>', unsafe_allow_html=True)
+
+
+# An <img> for a bundled SVG: its static URL, or a data: URL when static serving is off
+def image_html(name, alt, css_class):
+    if static_serving():
+        src = static_url(name)
+    else:
+        from base64 import b64encode
+        with open(static_path(name), 'rb') as f:
+            src = 'data:image/svg+xml;base64,' + b64encode(f.read()).decode()
+    return f'<img src="{src}" alt="{html.escape(alt)}" class="{css_class}">'
+
+
+# Regenerate style.min.css from style.css
+def build():
+    with open(static_path(STYLESHEET), encoding='utf-8') as f:
+        css = f.read()
+    with open(static_path(MINIFIED_STYLESHEET), 'w', encoding='utf-8', newline='\n') as f:
+        f.write(minify_css(css))
+
+
+# Size of a remote file from a HEAD request, or None if it can't be reached
+def remote_size(url, timeout=5):
+    try:
+        request = urllib.request.Request(url, method='HEAD', headers={'User-Agent': 'page-weight-report'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            length = response.headers.get('Content-Length')
+            return int(length) if length else None
+    except OSError:
+        return None
+
+
+# Bytes each page view costs, before (inline <style> blocks and remote images)
+# and after (a link to the cached stylesheet and bundled images)
+def page_weight(check_remote=True):
+    rows = []
+    inline = len(read_static(STYLESHEET).encode())
+    minified = len(read_static(MINIFIED_STYLESHEET).encode())
+    link = len(f'<link rel="stylesheet" href="{static_url(MINIFIED_STYLESHEET)}">'.encode())
+    rows.append(('stylesheet, sent on every rerun', inline, link))
+    rows.append(('stylesheet, first view', 0, minified))
+    for name, url in REMOTE_IMAGES.items():
+        rows.append((f'{name} (was {url.split("/")[2]})', remote_size(url) if check_remote else None,
+                     os.path.getsize(static_path(name))))
+    return rows
+
+
+def print_report(rows):
+    print(f"{'asset':<52} {'before':>10} {'after':>10}")
+    for label, before, after in rows:
+        before = 'unknown' if before is None else f'{before:,}'
+        print(f"{label:<52} {before:>10} {after:>10,}")
+    print("'before' for the stylesheet is the unminified inline CSS of both pages; "
+          "remote sizes come from a HEAD request ('unknown' when offline).")
+
+
+# python assets.py build   regenerate static/style.min.css
+# python assets.py report  page weight before/after bundling the assets
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and measure the bundled static assets.")
+    parser.add_argument('command', choices=['build', 'report'])
+    parser.add_argument('--offline', action='store_true', help="don't look up the remote image sizes")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        build()
+        print(f"Wrote {static_path(MINIFIED_STYLESHEET)} ({os.path.getsize(static_path(MINIFIED_STYLESHEET)):,} bytes)")
+    else:
+        print_report(page_weight(check_remote=not args.offline))
+
+
+if __name__ == '__main__':
+    main()
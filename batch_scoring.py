@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 5000
+ID_COLUMN = 'StudentID'
+
+
+# Columns the model was trained on, in training order
+def feature_columns(model):
+    return list(model.feature_names_in_)
+
+
+# Raise a readable error if a cohort file is missing any model input column
+def check_columns(columns, model):
+    missing = [col for col in feature_columns(model) if col not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+# Predict top careers for every row of a DataFrame with a single predict_proba call.
+# Ranking matches predict_careers(): highest probability first, ties in class order.
+# Given a neighbour index, also adds the most common career among each student's
+# nearest peers in the dataset (one batched k-NN query).
+def predict_careers_batch(df, model, top_n=3, neighbours=None):
+    probas = model.predict_proba(df[feature_columns(model)])
+    classes = np.asarray(model.classes_)
+    top_n = min(top_n, len(classes))
+    top_idx = np.argsort(-probas, axis=1, kind='stable')[:, :top_n]
+    top_probs = np.take_along_axis(probas, top_idx, axis=1)
+
+    results = pd.DataFrame(index=df.index)
+    if ID_COLUMN in df.columns:
+        results[ID_COLUMN] = df[ID_COLUMN]
+    for rank in range(top_n):
+        results[f'Career_{rank + 1}'] = classes[top_idx[:, rank]]
+        results[f'Probability_{rank + 1}'] = top_probs[:, rank].round(4)
+    if neighbours is not None:
+        peer_career, peer_share = neighbours.peer_careers(df)
+        results['Peer_Career'] = peer_career
+        results['Peer_Share'] = peer_share.round(2)
+    return results
+
+
+# Count data rows in a CSV file object without parsing it, then rewind
+def count_rows(source, block_size=1 << 20):
+    lines = 0
+    last = b'\n'
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        if isinstance(block, str):
+            block = block.encode()
+        lines += block.count(b'\n')
+        last = block[-1:]
+    source.seek(0)
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+
+# Score a results CSV chunk by chunk and write the recommendations to output.
+# Only one chunk is held in memory at a time, whatever the size of the input.
+# progress(rows_done) is called after each chunk. Returns the number of rows scored.
+def score_csv(source, model, output, top_n=3, chunksize=DEFAULT_CHUNKSIZE, progress=None, neighbours=None):
+    header = pd.read_csv(source, nrows=0)
+    check_columns(header.columns, model)
+    source.seek(0)
+
+    usecols = feature_columns(model)
+    if ID_COLUMN in header.columns:
+        usecols = [ID_COLUMN] + usecols
+
+    rows_done = 0
+    for chunk in pd.read_csv(source, usecols=usecols, chunksize=chunksize):
+        results = predict_careers_batch(chunk, model, top_n, neighbours)
+        results.to_csv(output, header=rows_done == 0, index=False)
+        rows_done += len(chunk)
+        if progress is not None:
+            progress(rows_done)
+    return rows_done
@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import artifacts
+import career_model
+import dataset_cache
+import estimators
+import synthetic_data
+from batch_scoring import predict_careers_batch
+from model_registry import registry
+
+DEFAULT_SIZES = [5000, 50000]
+DEFAULT_ESTIMATORS = [50, 150]
+DEFAULT_BATCH_SIZES = [1, 100, 5000]
+DEFAULT_REQUESTS = 200
+DEFAULT_REPEAT = 5
+
+# A result is a regression when its p50 latency is more than this fraction
+# slower (or its throughput this fraction lower) than the baseline
+DEFAULT_THRESHOLD = 0.2
+
+# Run in a fresh interpreter to time imports and the first model load
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import career_model
+imported = time.perf_counter()
+career_model.get_model(None, sys.argv[1], backend='sklearn')
+loaded = time.perf_counter()
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss = rss / 1024 if sys.platform != 'darwin' else rss / 1024 ** 2
+except ImportError:
+    rss = None
+print(json.dumps({'import': imported - start, 'load': loaded - imported, 'peak_rss_mb': rss}))
+"""
+
+# Modules the Recommendation page imports to serve an existing model, and the
+# packages that only training may pull in. Importing the serving modules in a
+# fresh interpreter must stay under STARTUP_BUDGET seconds (p50 of the runs).
+SERVING_MODULES = ['career_model', 'model_registry', 'model_trainer', 'prediction_cache', 'batch_scoring', 'metrics']
+TRAINING_ONLY_PACKAGES = ['sklearn']
+STARTUP_BUDGET = float(os.environ.get('CAREER_STARTUP_BUDGET', 1.5))
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}))
+"""
+
+
+# Peak resident set size of this process so far, in MB (None where unsupported).
+# This is a high-water mark, so later stages report at least the earlier peak.
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+
+
+def summarize(samples):
+    samples = np.asarray(samples, dtype=float)
+    return {
+        'n': int(len(samples)),
+        'mean': float(samples.mean()),
+        'p50': float(np.percentile(samples, 50)),
+        'p95': float(np.percentile(samples, 95)),
+        'p99': float(np.percentile(samples, 99)),
+    }
+
+
+# Call fn repeat times and return the per-call durations in seconds
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def record(stage, params, samples, items=None):
+    latency = summarize(samples)
+    result = {'stage': stage, 'params': params, 'latency': latency, 'peak_rss_mb': peak_rss_mb()}
+    if items is not None:
+        result['throughput'] = items / latency['p50'] if latency['p50'] > 0 else None
+    return result
+
+
+# Write a synthetic dataset of `rows` rows modelled on the bundled CSV
+# (see synthetic_data.py); unlike resampling, rows aren't duplicates
+def scale_dataset(rows, path, source=career_model.DATA_PATH):
+    return synthetic_data.generate(synthetic_data.fit(pd.read_csv(source)), rows, path, seed=0)
+
+
+def bench_load_data(csv_path, rows, workdir, repeat):
+    cache_dir = os.path.join(workdir, f'cache-{rows}')
+
+    # Cold: parse the CSV and build the columnar cache
+    def cold():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        dataset_cache.write_cache(dataset_cache.read_csv_compact(csv_path, career_model.COLUMNS_TO_DROP), cache_dir)
+
+    # Warm: map an existing cache
+    def warm():
+        dataset_cache.read_cache(cache_dir)
+
+    results = [record('load_data', {'rows': rows, 'mode': 'cold'}, time_calls(cold, repeat), rows)]
+    results.append(record('load_data', {'rows': rows, 'mode': 'warm'}, time_calls(warm, repeat), rows))
+    return results
+
+
+def bench_model(csv_path, data, rows, n_estimators, model_path, repeat):
+    model_params = {**estimators.default_params('random_forest'), 'n_estimators': n_estimators}
+    params = {'rows': rows, 'n_estimators': n_estimators}
+    samples = time_calls(lambda: career_model.train_model(data, model_path, csv_path, model_params, 'random_forest'), 1)
+    results = [record('train_model', params, samples, rows)]
+
+    # get_model: a fresh load from disk vs. a registry hit
+    def load():
+        registry.evict(model_path)
+        career_model.get_model(data, model_path, backend='sklearn')
+
+    results.append(record('get_model', {**params, 'mode': 'load'}, time_calls(load, repeat)))
+    results[-1]['artifact_mb'] = os.path.getsize(model_path) / 1024 ** 2
+    samples = time_calls(lambda: career_model.get_model(data, model_path, backend='sklearn'), repeat)
+    results.append(record('get_model', {**params, 'mode': 'hit'}, samples))
+    return results
+
+
+def bench_inference(data, rows, n_estimators, model_path, batch_sizes, requests):
+    results = []
+    X = data.drop(columns=['StudentID', career_model.TARGET_COL], errors='ignore')
+    records = X.head(requests).to_dict('records')
+    for backend in career_model.INFERENCE_BACKENDS:
+        model = career_model.get_model(data, model_path, backend=backend)
+        params = {'rows': rows, 'n_estimators': n_estimators, 'backend': backend}
+
+        rows_iter = iter(records * (requests // max(len(records), 1) + 1))
+        samples = time_calls(lambda: career_model.predict_careers(next(rows_iter), model), requests)
+        results.append(record('predict_careers', params, samples, 1))
+
+        for batch_size in batch_sizes:
+            batch = X.sample(n=batch_size, replace=batch_size > len(X), random_state=0)
+            samples = time_calls(lambda: predict_careers_batch(batch, model), max(3, min(requests, 10000 // batch_size)))
+            results.append(record('predict_batch', {**params, 'batch_size': batch_size}, samples, batch_size))
+    return results
+
+
+# k-NN "students like you" queries: one profile at a time and a batch per query
+def bench_neighbours(data, rows, batch_sizes, requests):
+    X = data.drop(columns=['StudentID', career_model.TARGET_COL], errors='ignore')
+    samples = time_calls(lambda: career_model.build_neighbours(data, None), 1)
+    results = [record('neighbours', {'rows': rows, 'mode': 'build'}, samples, rows)]
+    index = career_model.build_neighbours(data, None)
+
+    records = X.head(requests).to_dict('records')
+    rows_iter = iter(records * (requests // max(len(records), 1) + 1))
+    samples = time_calls(lambda: index.similar_students(next(rows_iter)), requests)
+    results.append(record('neighbours', {'rows': rows, 'mode': 'query'}, samples, 1))
+    for batch_size in batch_sizes:
+        batch = X.sample(n=batch_size, replace=batch_size > len(X), random_state=0)
+        samples = time_calls(lambda: index.peer_careers(batch), max(3, min(requests, 10000 // batch_size)))
+        results.append(record('neighbours', {'rows': rows, 'mode': 'batch', 'batch_size': batch_size}, samples, batch_size))
+    return results
+
+
+def bench_cold_start(model_path, repeat):
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT, os.path.abspath(model_path)],
+                                cwd=cwd, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    results = []
+    for phase in ('import', 'load'):
+        result = record('cold_start', {'phase': phase}, [run[phase] for run in runs])
+        result['peak_rss_mb'] = max((run['peak_rss_mb'] or 0) for run in runs) or None
+        results.append(result)
+    return results
+
+
+# Import the serving modules in fresh interpreters. Returns a list of problems:
+# training-only packages that got imported, or a p50 import time over budget.
+def check_startup(budget=STARTUP_BUDGET, repeat=DEFAULT_REPEAT):
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT] + SERVING_MODULES,
+                                cwd=cwd, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    problems = []
+    eager = sorted({name for run in runs for name in run['modules'] if name.split('.')[0] in TRAINING_ONLY_PACKAGES})
+    if eager:
+        problems.append(f"serving imports load training-only modules: {', '.join(eager[:10])}")
+    seconds = summarize([run['seconds'] for run in runs])['p50']
+    if seconds > budget:
+        problems.append(f"serving imports take {seconds:.2f}s (budget {budget:.2f}s)")
+    return problems, seconds
+
+
+# Run every stage for each dataset size and forest size. Artifacts and caches
+# are written under a temporary directory so the app's own are left alone.
+def run(sizes=DEFAULT_SIZES, estimators=DEFAULT_ESTIMATORS, batch_sizes=DEFAULT_BATCH_SIZES,
+        requests=DEFAULT_REQUESTS, repeat=DEFAULT_REPEAT, cold_start=True, quiet=False):
+    results = []
+    workdir = tempfile.mkdtemp(prefix='career-bench-')
+    try:
+        for rows in sizes:
+            csv_path = scale_dataset(rows, os.path.join(workdir, f'dataset-{rows}.csv'))
+            results += bench_load_data(csv_path, rows, workdir, repeat)
+            data = dataset_cache.read_cache(os.path.join(workdir, f'cache-{rows}'))
+            results += bench_neighbours(data, rows, batch_sizes, requests)
+            for n_estimators in estimators:
+                if not quiet:
+                    print(f"Benchmarking {rows:,} rows, {n_estimators} trees...", file=sys.stderr)
+                model_path = os.path.join(workdir, f'model-{rows}-{n_estimators}.pkl')
+                results += bench_model(csv_path, data, rows, n_estimators, model_path, repeat)
+                results += bench_inference(data, rows, n_estimators, model_path, batch_sizes, requests)
+                registry.evict(model_path)
+        if cold_start:
+            results += bench_cold_start(os.path.join(workdir, f'model-{sizes[0]}-{estimators[-1]}.pkl'), repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'versions': dict(artifacts.library_versions()),
+        'cpu_count': os.cpu_count(),
+        'config': {'sizes': sizes, 'estimators': estimators, 'batch_sizes': batch_sizes,
+                   'requests': requests, 'repeat': repeat},
+        'results': results,
+    }
+
+
+def result_key(result):
+    return result['stage'], json.dumps(result['params'], sort_keys=True)
+
+
+# Compare two benchmark runs. Returns (key, metric, baseline, current, change)
+# for each shared result whose p50 latency or throughput regressed past threshold.
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    previous = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        old_p50, new_p50 = old['latency']['p50'], result['latency']['p50']
+        if old_p50 > 0 and new_p50 > old_p50 * (1 + threshold):
+            regressions.append((result_key(result), 'p50', old_p50, new_p50, new_p50 / old_p50 - 1))
+        old_rate, new_rate = old.get('throughput'), result.get('throughput')
+        if old_rate and new_rate is not None and new_rate * (1 + threshold) < old_rate:
+            regressions.append((result_key(result), 'throughput', old_rate, new_rate, new_rate / old_rate - 1))
+    return regressions
+
+
+def format_params(params):
+    return ' '.join(f'{name}={value}' for name, value in params.items())
+
+
+def print_report(report):
+    print(f"{'stage':<16} {'params':<48} {'p50':>10} {'p95':>10} {'p99':>10} {'per sec':>12} {'peak RSS':>10}")
+    for result in report['results']:
+        latency = result['latency']
+        rate = f"{result['throughput']:,.0f}" if result.get('throughput') else ''
+        rss = f"{result['peak_rss_mb']:.0f}MB" if result.get('peak_rss_mb') else ''
+        print(f"{result['stage']:<16} {format_params(result['params']):<48} "
+              f"{latency['p50'] * 1e3:>8.2f}ms {latency['p95'] * 1e3:>8.2f}ms {latency['p99'] * 1e3:>8.2f}ms "
+              f"{rate:>12} {rss:>10}")
+
+
+# python benchmark.py [--sizes 5000 50000] [--estimators 50 150] [--output results.json]
+# python benchmark.py --compare baseline.json [--results results.json]
+# python benchmark.py --check-startup
+# Times data loading, training, model loading, inference and cold start headlessly.
+# With --compare, exits non-zero if any result regressed against the baseline.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data loading, training and inference.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="dataset sizes in rows")
+    parser.add_argument('--estimators', type=int, nargs='+', default=DEFAULT_ESTIMATORS, help="n_estimators values")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES, help="batch scoring sizes")
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help="single predictions per model")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="repetitions of each load/cold-start timing")
+    parser.add_argument('--no-cold-start', action='store_true', help="skip the fresh-interpreter cold start timing")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--results', help="compare an existing results file instead of running")
+    parser.add_argument('--compare', metavar='BASELINE', help="baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown fraction")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    parser.add_argument('--check-startup', action='store_true',
+                        help="only check that serving imports stay lazy and within the startup budget")
+    args = parser.parse_args(argv)
+
+    if args.check_startup:
+        problems, seconds = check_startup(repeat=args.repeat)
+        for problem in problems:
+            print(f"STARTUP {problem}")
+        if problems:
+            sys.exit(f"{len(problems)} startup problem(s)")
+        print(f"Serving imports: {seconds:.2f}s (budget {STARTUP_BUDGET:.2f}s), no training-only modules")
+        return
+
+    if args.results:
+        with open(args.results) as f:
+            report = json.load(f)
+    else:
+        report = run(args.sizes, args.estimators, args.batch_sizes, args.requests, args.repeat,
+                     not args.no_cold_start, args.quiet)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for (stage, params), metric, old, new, change in regressions:
+            print(f"REGRESSION {stage} {format_params(json.loads(params))}: {metric} {old:.4g} -> {new:.4g} ({change:+.0%})")
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s) against {args.compare}")
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
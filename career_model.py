@@ -0,0 +1,206 @@
+import pandas as pd
+import artifacts
+import dataset_cache
+import estimators
+import metrics
+import os
+import threading
+from model_registry import registry, save_model
+from fast_inference import compile_model, compiled_path, load_shared
+from neighbours import NeighbourIndex, index_registry, load_index, neighbours_path
+
+DATA_PATH = 'waec_subjects_career_dataset.csv'
+
+# Columns in the dataset that the model doesn't use
+COLUMNS_TO_DROP = [
+    'StudentID', 'Study_Habits', 'Analytical_Thinking', 'Creative_Thinking',
+    'Communication_Skills', 'Practical_Skills', 'Science_Club',
+    'Debate_Club'
+]
+
+CATEGORICAL_COLS = ['Learning_Style', 'Gender']
+TARGET_COL = 'Career_Path'
+
+# Estimator behind the shared preprocessing (see estimators.py) and its training
+# hyperparameters, both recorded in the model's manifest
+ESTIMATOR = estimators.check_name(os.environ.get('CAREER_ESTIMATOR', 'random_forest'))
+MODEL_PARAMS = estimators.default_params(ESTIMATOR)
+SPLIT_PARAMS = {'test_size': 0.2, 'random_state': 42}
+
+# How predictions are computed: 'sklearn' runs the fitted pipeline, 'compiled' runs
+# the same forest flattened into NumPy arrays (see fast_inference.py; random_forest only)
+INFERENCE_BACKEND = os.environ.get('CAREER_INFERENCE_BACKEND', 'sklearn')
+INFERENCE_BACKENDS = ('sklearn', 'compiled')
+
+# Load data: only the used columns, with compact dtypes, through the columnar
+# cache in dataset_cache.py (rebuilt whenever the CSV's contents change)
+def load_data(path=DATA_PATH):
+    return dataset_cache.load_dataset(path, COLUMNS_TO_DROP)
+
+# Manifest of the model trained from data_path with the current code and libraries:
+# dataset fingerprint, feature schema, hyperparameters and library versions
+def model_manifest(data_path=DATA_PATH, model_params=MODEL_PARAMS, estimator=ESTIMATOR):
+    columns = dataset_cache.read_columns(data_path)
+    features = [col for col in columns if col not in COLUMNS_TO_DROP and col != TARGET_COL]
+    schema = {
+        'numerical': [col for col in features if col not in CATEGORICAL_COLS],
+        'categorical': [col for col in features if col in CATEGORICAL_COLS],
+        'target': TARGET_COL,
+    }
+    params = {'estimator': estimators.class_name(estimator), **model_params, 'split': SPLIT_PARAMS}
+    return artifacts.build_manifest(dataset_cache.file_hash(data_path), schema, params)
+
+# Content-addressed artifact path for the current manifest; any change to the
+# dataset, schema, hyperparameters or library versions gives a new path.
+# Only the dataset can change while the process runs, so the path is kept per
+# version of the file and every page run doesn't rebuild the manifest.
+_base_paths = {}
+
+def base_model_path(data_path=DATA_PATH):
+    key = dataset_cache.file_key(data_path)
+    path = _base_paths.get(key)
+    if path is None:
+        path = _base_paths[key] = artifacts.artifact_path(model_manifest(data_path))
+    return path
+
+# The model to serve: the newest incremental update of the base model (see
+# model_updates.py), or the base model itself
+def current_model_path(data_path=DATA_PATH):
+    return artifacts.latest_version(base_model_path(data_path))
+
+# Features and target, split into train and held-out test sets
+def split_data(data):
+    # Training-only imports are deferred so serving an existing model never pays for them
+    from sklearn.model_selection import train_test_split
+
+    # Prepare features and target
+    X = data.drop(columns=['StudentID', TARGET_COL], errors='ignore')
+    y = data[TARGET_COL]
+
+    # Split data
+    return train_test_split(X, y, **SPLIT_PARAMS)
+
+# Unfitted preprocessing + estimator pipeline for the given feature columns
+def build_pipeline(columns, model_params=MODEL_PARAMS, estimator=ESTIMATOR):
+    from sklearn.preprocessing import StandardScaler, OneHotEncoder
+    from sklearn.pipeline import Pipeline
+    from sklearn.compose import ColumnTransformer
+
+    # Define categorical and numerical columns
+    categorical_cols = CATEGORICAL_COLS
+    numerical_cols = [col for col in columns if col not in categorical_cols]
+
+    # Create preprocessing pipelines
+    numerical_transformer = Pipeline(steps=[('scaler', StandardScaler())])
+    categorical_transformer = Pipeline(steps=[('onehot', OneHotEncoder(handle_unknown='ignore'))])
+
+    # Combine preprocessing steps
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', numerical_transformer, numerical_cols),
+            ('cat', categorical_transformer, categorical_cols)
+        ])
+
+    # Create the modeling pipeline
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', estimators.make_estimator(estimator, model_params))
+    ])
+
+# Train model
+def train_model(data, model_path=None, data_path=DATA_PATH, model_params=MODEL_PARAMS, estimator=ESTIMATOR):
+    manifest = model_manifest(data_path, model_params, estimator)
+    model_path = model_path or artifacts.artifact_path(manifest)
+
+    X_train, X_test, y_train, y_test = split_data(data)
+    model = build_pipeline(X_train.columns, model_params, estimator)
+
+    # Train the model
+    model.fit(X_train, y_train)
+
+    # Save model (atomically, so other processes never load a half-written file)
+    save_model(model, model_path)
+    artifacts.write_manifest(model_path, manifest)
+
+    # The "students like you" index is built from the same data and shipped with it
+    save_model(build_neighbours(data, data_path), neighbours_path(model_path))
+
+    return model
+
+# Nearest-neighbour index over every student's subject scores, labelled with
+# their StudentIDs when data_path has them (load_data drops the column)
+def build_neighbours(data, data_path=DATA_PATH):
+    subjects = [col for col in data.columns if col not in CATEGORICAL_COLS + ['StudentID', TARGET_COL]]
+    row_ids = None
+    if data_path is not None and 'StudentID' in dataset_cache.read_columns(data_path):
+        ids = pd.read_csv(data_path, usecols=['StudentID'])['StudentID']
+        if len(ids) == len(data):
+            row_ids = ids.to_numpy()
+    return NeighbourIndex.build(data, subjects, TARGET_COL, row_ids)
+
+# The neighbour index shipped with model_path (built now for older artifacts)
+def get_neighbours(data, model_path=None, data_path=DATA_PATH):
+    model_path = model_path or current_model_path(data_path)
+    return load_index(model_path, lambda: build_neighbours(data, data_path))
+
+# Wrap a fitted pipeline for the selected inference backend. Given the pipeline's
+# model_path, the compiled backend maps the compiled artifact shared by every
+# process on the host instead of compiling a private copy (model may then be None).
+def use_backend(model, backend=INFERENCE_BACKEND, model_path=None, registry=registry):
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend == 'sklearn':
+        return model
+    if model_path is None:
+        return compile_model(model)
+    return load_shared(model_path, registry, model)
+
+# Artifact a process actually serves from for model_path and backend
+def serving_path(model_path=None, backend=INFERENCE_BACKEND):
+    model_path = model_path or current_model_path()
+    return compiled_path(model_path) if backend == 'compiled' else model_path
+
+# Load or train model (loaded once per process and shared by all sessions).
+# A model is only retrained when no artifact matches the current manifest, and
+# by default under the training lock (model_trainer.train_exclusive), so
+# processes starting on a fresh checkout never fit it twice.
+def get_model(data, model_path=None, trainer=None, backend=INFERENCE_BACKEND):
+    model_path = model_path or current_model_path()
+    if registry.is_loaded(model_path) or os.path.exists(model_path):
+        # The compiled backend only needs the pipeline to rebuild its artifact
+        model = registry.get(model_path) if backend == 'sklearn' else None
+    else:
+        if trainer is None:
+            from model_trainer import train_exclusive as trainer
+        model = registry.register(model_path, trainer(data, model_path))
+    return use_backend(model, backend, model_path)
+
+# The model path this process last served. When a newer version replaces it, the
+# old pipeline, compiled artifact and neighbour index leave the registries, so a
+# long-running process holds only the version it serves.
+_served_path = None
+_served_lock = threading.Lock()
+
+def retire_previous(model_path):
+    global _served_path
+    with _served_lock:
+        previous, _served_path = _served_path, model_path
+    if previous is not None and previous != model_path:
+        registry.evict(previous)
+        registry.evict(compiled_path(previous))
+        index_registry.evict(neighbours_path(previous))
+
+# Predict careers
+def predict_careers(student_data, model, top_n=3):
+    if hasattr(model, 'predict_proba_row'):
+        with metrics.stage('predict_proba'):
+            probas = [model.predict_proba_row(student_data)]
+    else:
+        with metrics.stage('build_frame'):
+            student_df = pd.DataFrame([student_data])
+        with metrics.stage('predict_proba'):
+            probas = model.predict_proba(student_df)
+    classes = model.classes_
+    career_probs = [(classes[i], probas[0][i]) for i in range(len(classes))]
+    career_probs.sort(key=lambda x: x[1], reverse=True)
+    return career_probs[:top_n]
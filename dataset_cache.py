@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.environ.get('CAREER_DATASET_CACHE', '.dataset_cache')
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+CACHE_FORMAT = 1
+
+# Columns stored as pandas categoricals (int codes + category list)
+CATEGORY_COLUMNS = ['Learning_Style', 'Gender', 'Career_Path']
+
+
+# Hashes and headers already read, keyed on (path, mtime, size) so an unchanged
+# file is only read once per process
+_hashes = {}
+_columns = {}
+
+
+# Identity of a file's current contents, as far as the file system can tell
+def file_key(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+# SHA-256 of a file's contents
+def file_hash(path, block_size=1 << 20):
+    key = file_key(path)
+    digest = _hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                sha.update(block)
+        digest = _hashes[key] = sha.hexdigest()
+    return digest
+
+
+# Column names of a CSV, read from its header only
+def read_columns(csv_path):
+    key = file_key(csv_path)
+    columns = _columns.get(key)
+    if columns is None:
+        columns = _columns[key] = list(pd.read_csv(csv_path, nrows=0).columns)
+    return list(columns)
+
+
+# Cache directory for a CSV: keyed on its content and on the columns kept
+def cache_path(csv_path, drop_columns, cache_dir=CACHE_DIR):
+    key = hashlib.sha256(json.dumps([CACHE_FORMAT, file_hash(csv_path), sorted(drop_columns)]).encode()).hexdigest()
+    return os.path.join(cache_dir, f'dataset-{key[:16]}')
+
+
+# Smallest integer dtype that holds every value of a column
+def compact_int_dtype(values):
+    if len(values) == 0:
+        return np.dtype(np.uint8)
+    return np.result_type(np.min_scalar_type(values.min()), np.min_scalar_type(values.max()))
+
+
+# Parse the CSV once, keeping only the needed columns, with compact dtypes
+def read_csv_compact(csv_path, drop_columns=()):
+    drop = set(drop_columns)
+    dtypes = {col: 'category' for col in CATEGORY_COLUMNS}
+    data = pd.read_csv(csv_path, usecols=lambda col: col not in drop, dtype=dtypes)
+    for col in data.columns:
+        if pd.api.types.is_integer_dtype(data[col]):
+            data[col] = data[col].astype(compact_int_dtype(data[col].to_numpy()))
+    return data
+
+
+# Write a DataFrame as one .npy file per column plus a JSON schema.
+# The directory is built under a temporary name and renamed into place so
+# concurrent readers never see a partial cache.
+def write_cache(data, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(path) + '.', dir=os.path.dirname(path) or '.')
+    schema = {'format': CACHE_FORMAT, 'rows': len(data), 'columns': []}
+    for i, col in enumerate(data.columns):
+        series = data[col]
+        entry = {'name': col, 'file': f'{i}.npy'}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry['categories'] = [str(c) for c in series.cat.categories]
+            codes = series.cat.codes.to_numpy()
+            np.save(os.path.join(tmp_dir, entry['file']), codes.astype(compact_int_dtype(codes)))
+        elif series.dtype == object or pd.api.types.is_string_dtype(series):
+            entry['strings'] = True
+            np.save(os.path.join(tmp_dir, entry['file']), series.to_numpy(dtype=str))
+        else:
+            np.save(os.path.join(tmp_dir, entry['file']), series.to_numpy())
+        schema['columns'].append(entry)
+    with open(os.path.join(tmp_dir, 'schema.json'), 'w') as f:
+        json.dump(schema, f)
+    try:
+        os.rename(tmp_dir, path)
+    except OSError:
+        # Another process published the same cache first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# Load a cache directory; numeric columns stay memory-mapped (read-only)
+def read_cache(path):
+    with open(os.path.join(path, 'schema.json')) as f:
+        schema = json.load(f)
+    columns = {}
+    for entry in schema['columns']:
+        values = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            columns[entry['name']] = pd.Categorical.from_codes(values, categories=entry['categories'])
+        elif entry.get('strings'):
+            columns[entry['name']] = np.asarray(values, dtype=object)
+        else:
+            columns[entry['name']] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+# Load a dataset through the columnar cache, building the cache on first use
+def load_dataset(csv_path, drop_columns=()):
+    path = cache_path(csv_path, drop_columns)
+    if not os.path.exists(os.path.join(path, 'schema.json')):
+        write_cache(read_csv_compact(csv_path, drop_columns), path)
+    return read_cache(path)
+
+
+# python dataset_cache.py [dataset.csv]
+# Compares load time and memory of parsing the CSV with default dtypes against the cache
+def main(argv=None):
+    from career_model import DATA_PATH, COLUMNS_TO_DROP as DROP_COLUMNS
+
+    argv = sys.argv[1:] if argv is None else argv
+    csv_path = argv[0] if argv else DATA_PATH
+
+    start = time.perf_counter()
+    csv_data = pd.read_csv(csv_path).drop(columns=list(DROP_COLUMNS), errors='ignore')
+    csv_time = time.perf_counter() - start
+    csv_memory = csv_data.memory_usage(deep=True).sum()
+
+    load_dataset(csv_path, DROP_COLUMNS)  # make sure the cache exists
+    start = time.perf_counter()
+    cached = load_dataset(csv_path, DROP_COLUMNS)
+    cache_time = time.perf_counter() - start
+    cache_memory = cached.memory_usage(deep=True).sum()
+    cache_dir = cache_path(csv_path, DROP_COLUMNS)
+    cache_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+
+    print(f"{'':>8} {'load time':>12} {'memory':>12}")
+    print(f"{'CSV':>8} {csv_time * 1e3:>10.1f}ms {csv_memory / 1024:>10.0f}KB")
+    print(f"{'cache':>8} {cache_time * 1e3:>10.1f}ms {cache_memory / 1024:>10.0f}KB")
+    print(f"Load {csv_time / cache_time:.1f}x faster, {csv_memory / cache_memory:.1f}x less memory "
+          f"({os.path.getsize(csv_path) / 1024:.0f}KB CSV, {cache_bytes / 1024:.0f}KB cache at {cache_dir})")
+
+
+if __name__ == '__main__':
+    main()
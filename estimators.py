@@ -0,0 +1,124 @@
+import argparse
+import importlib
+import json
+import sys
+import time
+
+import numpy as np
+
+# Candidate estimators behind the shared preprocessing in career_model.build_pipeline.
+# Each entry is (module, class name, default hyperparameters); classes are imported
+# only when a model is built, so serving never loads the ones it doesn't use.
+ESTIMATORS = {
+    'random_forest': ('sklearn.ensemble', 'RandomForestClassifier', {'n_estimators': 150, 'random_state': 42}),
+    'hist_gradient_boosting': ('sklearn.ensemble', 'HistGradientBoostingClassifier',
+                               {'max_iter': 200, 'learning_rate': 0.1, 'random_state': 42}),
+    'logistic_regression': ('sklearn.linear_model', 'LogisticRegression', {'C': 1.0, 'max_iter': 2000}),
+    'knn': ('sklearn.neighbors', 'KNeighborsClassifier', {'n_neighbors': 25, 'weights': 'distance'}),
+}
+
+# Budgets for automatic selection
+DEFAULT_LATENCY_BUDGET_MS = 20.0
+DEFAULT_TRAIN_BUDGET_S = 60.0
+
+
+def check_name(name):
+    if name not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator: {name} (choose from {', '.join(ESTIMATORS)})")
+    return name
+
+
+def class_name(name):
+    return ESTIMATORS[check_name(name)][1]
+
+
+def default_params(name):
+    return dict(ESTIMATORS[check_name(name)][2])
+
+
+def make_estimator(name, params=None):
+    module, cls, defaults = ESTIMATORS[check_name(name)]
+    return getattr(importlib.import_module(module), cls)(**(defaults if params is None else params))
+
+
+# Fit every candidate on the training split and measure it on the held-out split
+def evaluate_all(data, names=None, quiet=False):
+    import career_model
+    from model_tuning import single_row_latencies
+
+    X_train, X_test, y_train, y_test = career_model.split_data(data)
+    results = []
+    for name in names or ESTIMATORS:
+        if not quiet:
+            print(f"Evaluating {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        model = career_model.build_pipeline(X_train.columns, default_params(name), name).fit(X_train, y_train)
+        train_seconds = time.perf_counter() - started
+        probas = model.predict_proba(X_test)
+        classes = np.asarray(model.classes_)
+        y = np.asarray(y_test)
+        top3 = classes[np.argsort(-probas, axis=1, kind='stable')[:, :3]]
+        latency = single_row_latencies(model, X_test)
+        results.append({
+            'estimator': name,
+            'params': default_params(name),
+            'accuracy': float(np.mean(classes[np.argmax(probas, axis=1)] == y)),
+            'top3_accuracy': float(np.mean((top3 == y[:, np.newaxis]).any(axis=1))),
+            'train_seconds': train_seconds,
+            'p50_ms': float(np.percentile(latency, 50) * 1e3),
+            'p99_ms': float(np.percentile(latency, 99) * 1e3),
+        })
+    return results
+
+
+# Most accurate candidate within both budgets, or None if none fits
+def choose(results, latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, train_budget_s=DEFAULT_TRAIN_BUDGET_S):
+    eligible = [result for result in results
+                if result['p99_ms'] <= latency_budget_ms and result['train_seconds'] <= train_budget_s]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda result: (result['accuracy'], -result['p99_ms']))
+
+
+# python estimators.py [--latency-budget-ms 20] [--train-budget-s 60] [--export]
+# Compares every registered estimator on the held-out split and picks the most
+# accurate one whose p99 single-row latency and training time fit the budgets.
+def main(argv=None):
+    import artifacts
+    import career_model
+
+    parser = argparse.ArgumentParser(description="Pick an estimator backend under latency and training budgets.")
+    parser.add_argument('--estimators', nargs='+', choices=sorted(ESTIMATORS), default=None)
+    parser.add_argument('--latency-budget-ms', type=float, default=DEFAULT_LATENCY_BUDGET_MS)
+    parser.add_argument('--train-budget-s', type=float, default=DEFAULT_TRAIN_BUDGET_S)
+    parser.add_argument('--output', help="write all results as JSON")
+    parser.add_argument('--export', action='store_true', help="train and save the chosen estimator")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    args = parser.parse_args(argv)
+
+    data = career_model.load_data()
+    results = evaluate_all(data, args.estimators, args.quiet)
+    chosen = choose(results, args.latency_budget_ms, args.train_budget_s)
+
+    print(f"{'estimator':<24} {'accuracy':>9} {'top-3':>7} {'train':>9} {'p50':>9} {'p99':>9}")
+    for result in sorted(results, key=lambda result: -result['accuracy']):
+        marker = '*' if result is chosen else ' '
+        print(f"{marker}{result['estimator']:<23} {result['accuracy']:>9.3f} {result['top3_accuracy']:>7.3f} "
+              f"{result['train_seconds']:>8.2f}s {result['p50_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'latency_budget_ms': args.latency_budget_ms, 'train_budget_s': args.train_budget_s,
+                       'chosen': chosen and chosen['estimator'], 'results': results}, f, indent=2)
+    if chosen is None:
+        sys.exit(f"No estimator fits p99 <= {args.latency_budget_ms}ms and training <= {args.train_budget_s}s")
+
+    print(f"Chosen: {chosen['estimator']} (* above)")
+    if args.export:
+        manifest = career_model.model_manifest(model_params=chosen['params'], estimator=chosen['estimator'])
+        model_path = artifacts.artifact_path(manifest)
+        career_model.train_model(data, model_path, model_params=chosen['params'], estimator=chosen['estimator'])
+        print(f"Exported to {model_path}; serve it with CAREER_ESTIMATOR={chosen['estimator']}")
+
+
+if __name__ == '__main__':
+    main()
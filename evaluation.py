@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import artifacts
+import career_model
+import estimators
+
+DEFAULT_FOLDS = 5
+CALIBRATION_BINS = 10
+
+
+# Manifest of a cross-validation run: the model's manifest (dataset hash, schema,
+# hyperparameters, library versions) plus the fold setup. Its key names the
+# cached results, so an unchanged setup is never evaluated twice.
+def evaluation_manifest(data_path=career_model.DATA_PATH, model_params=career_model.MODEL_PARAMS,
+                        estimator=career_model.ESTIMATOR, folds=DEFAULT_FOLDS):
+    manifest = career_model.model_manifest(data_path, model_params, estimator)
+    manifest['kind'] = 'evaluation'
+    manifest['hyperparameters'] = {**manifest['hyperparameters'], 'cv': {'folds': folds, 'shuffle': True, 'random_state': 42}}
+    return manifest
+
+
+def results_path(manifest):
+    return artifacts.artifact_path(manifest, suffix='.json')
+
+
+def _fit_fold(X, y, train_idx, test_idx, model_params, estimator):
+    model = career_model.build_pipeline(X.columns, model_params, estimator)
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    return test_idx, model.predict_proba(X.iloc[test_idx]), list(model.classes_)
+
+
+# Reliability curve for one class: mean predicted probability vs. observed
+# frequency in equal-width probability bins
+def calibration_curve(probs, hits, bins=CALIBRATION_BINS):
+    which = np.minimum((probs * bins).astype(int), bins - 1)
+    curve = []
+    for b in range(bins):
+        mask = which == b
+        if mask.any():
+            curve.append({'bin': b, 'predicted': float(probs[mask].mean()), 'observed': float(hits[mask].mean()),
+                          'count': int(mask.sum())})
+    return curve
+
+
+# Metrics from out-of-fold probabilities
+def summarize(y, probas, classes):
+    classes = np.asarray(classes, dtype=object)
+    y = np.asarray(y, dtype=object)
+    true_idx = np.searchsorted(classes, y)
+    pred_idx = np.argmax(probas, axis=1)
+    top3 = np.argsort(-probas, axis=1, kind='stable')[:, :3]
+
+    n = len(classes)
+    confusion = np.zeros((n, n), dtype=np.int64)
+    np.add.at(confusion, (true_idx, pred_idx), 1)
+
+    per_class = {}
+    for i, name in enumerate(classes):
+        tp = confusion[i, i]
+        predicted = confusion[:, i].sum()
+        support = confusion[i, :].sum()
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / support if support else 0.0
+        hits = (true_idx == i).astype(float)
+        per_class[str(name)] = {
+            'precision': float(precision),
+            'recall': float(recall),
+            'f1': float(2 * precision * recall / (precision + recall)) if precision + recall else 0.0,
+            'support': int(support),
+            'brier': float(np.mean((probas[:, i] - hits) ** 2)),
+            'calibration': calibration_curve(probas[:, i], hits),
+        }
+
+    # Expected calibration error of the top prediction
+    confidence = probas[np.arange(len(y)), pred_idx]
+    correct = (pred_idx == true_idx).astype(float)
+    which = np.minimum((confidence * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    ece = sum(abs(confidence[which == b].mean() - correct[which == b].mean()) * (which == b).mean()
+              for b in range(CALIBRATION_BINS) if (which == b).any())
+
+    return {
+        'rows': int(len(y)),
+        'accuracy': float(correct.mean()),
+        'top3_accuracy': float((top3 == true_idx[:, np.newaxis]).any(axis=1).mean()),
+        'expected_calibration_error': float(ece),
+        'classes': [str(c) for c in classes],
+        'confusion_matrix': confusion.tolist(),
+        'per_class': per_class,
+    }
+
+
+# k-fold cross-validation with the folds fitted in parallel (n_jobs processes)
+def cross_validate(data, model_params=career_model.MODEL_PARAMS, estimator=career_model.ESTIMATOR,
+                   folds=DEFAULT_FOLDS, n_jobs=-1):
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import StratifiedKFold
+
+    X = data.drop(columns=['StudentID', career_model.TARGET_COL], errors='ignore')
+    y = data[career_model.TARGET_COL].astype(str)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+
+    started = time.perf_counter()
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(X, y, train_idx, test_idx, model_params, estimator)
+        for train_idx, test_idx in splitter.split(X, y)
+    )
+    classes = sorted({c for _, _, fold_classes in fitted for c in fold_classes})
+    probas = np.zeros((len(X), len(classes)))
+    for test_idx, fold_probas, fold_classes in fitted:
+        columns = [classes.index(c) for c in fold_classes]
+        probas[np.ix_(test_idx, columns)] = fold_probas
+
+    results = summarize(y.to_numpy(), probas, classes)
+    results['folds'] = folds
+    results['seconds'] = time.perf_counter() - started
+    return results
+
+
+def load_results(manifest):
+    path = results_path(manifest)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def save_results(manifest, results):
+    path = results_path(manifest)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    record = {'key': artifacts.manifest_key(manifest), 'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+              'manifest': manifest, 'results': results}
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, 'w') as f:
+        json.dump(record, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Cross-validation results for the current dataset and hyperparameters, computed
+# only when no cached results match. Returns (results, cached).
+def evaluate(data=None, data_path=career_model.DATA_PATH, model_params=career_model.MODEL_PARAMS,
+             estimator=career_model.ESTIMATOR, folds=DEFAULT_FOLDS, n_jobs=-1, force=False):
+    manifest = evaluation_manifest(data_path, model_params, estimator, folds)
+    results = None if force else load_results(manifest)
+    if results is not None:
+        return results, True
+    data = career_model.load_data(data_path) if data is None else data
+    results = cross_validate(data, model_params, estimator, folds, n_jobs)
+    save_results(manifest, results)
+    return results, False
+
+
+# python evaluation.py [--folds 5] [--jobs -1] [--force]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate the career model.")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel fold fits (-1: all cores)")
+    parser.add_argument('--estimator', choices=sorted(estimators.ESTIMATORS), default=career_model.ESTIMATOR)
+    parser.add_argument('--force', action='store_true', help="ignore cached results")
+    args = parser.parse_args(argv)
+
+    if args.estimator == career_model.ESTIMATOR:
+        params = career_model.MODEL_PARAMS
+    else:
+        params = estimators.default_params(args.estimator)
+    results, cached = evaluate(model_params=params, estimator=args.estimator, folds=args.folds,
+                               n_jobs=args.jobs, force=args.force)
+    source = 'cached' if cached else f"computed in {results['seconds']:.1f}s"
+    print(f"{results['folds']}-fold CV on {results['rows']:,} rows ({source}): accuracy {results['accuracy']:.3f}, "
+          f"top-3 {results['top3_accuracy']:.3f}, ECE {results['expected_calibration_error']:.3f}")
+    print(f"{'career':<22} {'precision':>9} {'recall':>7} {'f1':>6} {'brier':>7} {'support':>8}")
+    for name, stats in results['per_class'].items():
+        print(f"{name:<22} {stats['precision']:>9.3f} {stats['recall']:>7.3f} {stats['f1']:>6.3f} "
+              f"{stats['brier']:>7.3f} {stats['support']:>8}")
+
+
+if __name__ == '__main__':
+    main()
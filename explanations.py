@@ -0,0 +1,104 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from fast_inference import compile_model
+
+DEFAULT_TOP_FEATURES = 5
+
+
+# Per-node tables for tree path contributions, precomputed once per forest.
+# Walking from a node to its child changes the predicted distribution by
+# delta[child] = value[child] - value[parent]; that change is credited to the
+# input column the parent split on (one-hot columns map back to their
+# categorical input). A prediction is then bias + the deltas along its paths,
+# averaged over the trees.
+class ContributionTables:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.inputs = compiled.numerical_cols + compiled.categorical_cols
+        n_num = len(compiled.numerical_cols)
+        input_of = np.concatenate([np.arange(n_num)] + [np.full(len(cats), n_num + j)
+                                                         for j, cats in enumerate(compiled.categories)]).astype(np.intp)
+
+        n_nodes = len(compiled.left)
+        internal = np.flatnonzero(~compiled._is_leaf)
+        parent = np.full(n_nodes, -1, dtype=np.intp)
+        parent[compiled.left[internal]] = internal
+        parent[compiled.right[internal]] = internal
+        has_parent = parent >= 0
+
+        self.delta = np.zeros_like(compiled.value)
+        self.delta[has_parent] = compiled.value[has_parent] - compiled.value[parent[has_parent]]
+        self.split_input = np.zeros(n_nodes, dtype=np.intp)
+        self.split_input[has_parent] = input_of[compiled.feature[parent[has_parent]]]
+        self.bias = compiled.value[compiled.roots].mean(axis=0)
+
+    # Contributions for a transformed matrix, shape (rows, inputs, classes).
+    # Traversal is the same level-by-level walk as CompiledForest.apply; the
+    # visited nodes are then summed per (row, input) with one bincount per class.
+    def contributions_transformed(self, Xt):
+        compiled = self.compiled
+        n_rows, n_cols = Xt.shape
+        n_trees = len(compiled.roots)
+        n_inputs = len(self.inputs)
+        flat = np.ascontiguousarray(Xt).ravel()
+        node = np.tile(compiled.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), n_trees)
+        row_start = row * n_cols
+        visited, slots = [], []
+        active = np.flatnonzero(~compiled._is_leaf[node])
+        while active.size:
+            current = node[active]
+            go_right = flat[row_start[active] + compiled.feature[current]] > compiled.threshold[current]
+            node[active] = following = compiled._children[2 * current + go_right]
+            visited.append(following)
+            slots.append(row[active] * n_inputs + self.split_input[following])
+            active = active[~compiled._is_leaf[following]]
+
+        n_classes = self.delta.shape[1]
+        contributions = np.zeros((n_rows * n_inputs, n_classes))
+        if visited:
+            visited = np.concatenate(visited)
+            slots = np.concatenate(slots)
+            for c in range(n_classes):
+                contributions[:, c] = np.bincount(slots, weights=self.delta[visited, c], minlength=n_rows * n_inputs)
+        contributions /= n_trees
+        return contributions.reshape(n_rows, n_inputs, n_classes)
+
+
+_tables = weakref.WeakKeyDictionary()
+
+
+def contribution_tables(model):
+    compiled = compile_model(model)
+    tables = _tables.get(compiled)
+    if tables is None:
+        tables = _tables[compiled] = ContributionTables(compiled)
+    return tables
+
+
+# Explain a batch: X is a DataFrame or list of student dicts. Returns
+# (bias (classes,), contributions (rows, inputs, classes), input names); for
+# every row bias + contributions.sum(axis=1) equals model.predict_proba.
+# Only random forest pipelines can be explained (ValueError otherwise).
+def explain(model, X):
+    tables = contribution_tables(model)
+    if not isinstance(X, pd.DataFrame):
+        X = pd.DataFrame(X)
+    return tables.bias, tables.contributions_transformed(tables.compiled.transform(X)), tables.inputs
+
+
+# The inputs that moved each of careers' probabilities the most for one student,
+# as {career: [(input, contribution), ...]} ordered by absolute contribution
+def top_drivers(student_data, model, careers, k=DEFAULT_TOP_FEATURES):
+    tables = contribution_tables(model)
+    contributions = tables.contributions_transformed(tables.compiled.transform_row(student_data))[0]
+    class_index = {career: i for i, career in enumerate(tables.compiled.classes_)}
+    drivers = {}
+    for career in careers:
+        values = contributions[:, class_index[career]]
+        order = np.argsort(-np.abs(values), kind='stable')[:k]
+        drivers[career] = [(tables.inputs[i], float(values[i])) for i in order]
+    return drivers
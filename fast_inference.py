@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import weakref
+import joblib
+import numpy as np
+import pandas as pd
+
+from model_registry import save_model
+
+
+# The fitted preprocessing + RandomForest pipeline flattened into contiguous NumPy
+# arrays. Rows are scaled and one-hot encoded with plain array ops and every tree is
+# walked at once with vectorized gathers, so a prediction skips the DataFrame,
+# ColumnTransformer and per-tree dispatch of the sklearn path while producing the
+# same probabilities as model.predict_proba.
+class CompiledForest:
+    def __init__(self, numerical_cols, mean, scale, categorical_cols, categories,
+                 classes, feature, threshold, left, right, value, roots, max_depth):
+        self.numerical_cols = list(numerical_cols)
+        self.mean = mean
+        self.scale = scale
+        self.categorical_cols = list(categorical_cols)
+        self.categories = [np.asarray(cats, dtype=object) for cats in categories]
+        self._category_index = [{c: i for i, c in enumerate(cats)} for cats in self.categories]
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.feature_names_in_ = np.asarray(self.numerical_cols + self.categorical_cols, dtype=object)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        # Interleaved (left, right) children so one gather picks the next node
+        self._children = np.stack([left, right], axis=1).ravel()
+        self._is_leaf = left == np.arange(len(left))
+        self.n_features = len(self.numerical_cols) + sum(len(cats) for cats in self.categories)
+
+    # Flatten a fitted Pipeline(preprocessor=ColumnTransformer(num scaler, cat onehot), classifier=forest)
+    @classmethod
+    def from_pipeline(cls, model):
+        preprocessor = model.named_steps['preprocessor']
+        forest = model.named_steps['classifier']
+
+        numerical_cols, categorical_cols = [], []
+        scaler = encoder = None
+        for name, transformer, cols in preprocessor.transformers_:
+            if transformer == 'drop' or name == 'remainder':
+                continue
+            step = transformer.steps[-1][1] if hasattr(transformer, 'steps') else transformer
+            if name == 'num':
+                numerical_cols, scaler = list(cols), step
+            elif name == 'cat':
+                categorical_cols, encoder = list(cols), step
+            else:
+                raise ValueError(f"Unsupported transformer in pipeline: {name}")
+        if scaler is None or encoder is None or not hasattr(forest, 'estimators_'):
+            raise ValueError("Only the scaler + one-hot + forest pipeline can be compiled")
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(len(numerical_cols))
+        scale = scaler.scale_ if scaler.with_std else np.ones(len(numerical_cols))
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            # Leaves point at themselves so extra traversal steps are no-ops
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            # Same normalization as DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :]
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            numerical_cols, np.ascontiguousarray(mean, dtype=np.float64), np.ascontiguousarray(scale, dtype=np.float64),
+            categorical_cols, encoder.categories_, forest.classes_,
+            np.concatenate(features).astype(np.intp), np.concatenate(thresholds).astype(np.float64),
+            np.concatenate(lefts).astype(np.intp), np.concatenate(rights).astype(np.intp),
+            np.ascontiguousarray(np.concatenate(values), dtype=np.float64), np.asarray(roots, dtype=np.intp), max_depth,
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    # Preprocess a DataFrame (or list of dicts) into the float32 matrix the trees split on
+    def transform(self, X):
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X)
+        out = np.zeros((len(X), self.n_features), dtype=np.float64)
+        n_num = len(self.numerical_cols)
+        out[:, :n_num] = (X[self.numerical_cols].to_numpy(dtype=np.float64) - self.mean) / self.scale
+        col = n_num
+        rows = np.arange(len(X))
+        for name, cats in zip(self.categorical_cols, self.categories):
+            codes = pd.Categorical(X[name], categories=cats).codes
+            known = codes >= 0
+            out[rows[known], col + codes[known]] = 1.0
+            col += len(cats)
+        return out.astype(np.float32)
+
+    # Preprocess a single student dict without going through pandas
+    def transform_row(self, row):
+        out = np.zeros((1, self.n_features), dtype=np.float64)
+        n_num = len(self.numerical_cols)
+        values = np.array([row[name] for name in self.numerical_cols], dtype=np.float64)
+        out[0, :n_num] = (values - self.mean) / self.scale
+        col = n_num
+        for name, index in zip(self.categorical_cols, self._category_index):
+            code = index.get(row[name])
+            if code is not None:
+                out[0, col + code] = 1.0
+            col += len(index)
+        return out.astype(np.float32)
+
+    # Leaf node reached in every tree for every row of a transformed matrix, shape (rows, trees).
+    # All (row, tree) pairs advance one level per step; pairs that reached a leaf drop out.
+    def apply(self, Xt):
+        n_rows, n_cols = Xt.shape
+        n_trees = len(self.roots)
+        flat = np.ascontiguousarray(Xt).ravel()
+        node = np.tile(self.roots, n_rows)
+        row_start = np.repeat(np.arange(n_rows) * n_cols, n_trees)
+        active = np.flatnonzero(~self._is_leaf[node])
+        while active.size:
+            current = node[active]
+            go_right = flat[row_start[active] + self.feature[current]] > self.threshold[current]
+            node[active] = following = self._children[2 * current + go_right]
+            active = active[~self._is_leaf[following]]
+        return node.reshape(n_rows, n_trees)
+
+    # Class probabilities for a transformed matrix; trees are summed in order, like sklearn
+    def predict_proba_transformed(self, Xt):
+        proba = self.value[self.apply(Xt)].sum(axis=1)
+        proba /= len(self.roots)
+        return proba
+
+    def predict_proba(self, X):
+        return self.predict_proba_transformed(self.transform(X))
+
+    def predict_proba_row(self, row):
+        return self.predict_proba_transformed(self.transform_row(row))[0]
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# Compiled forms are cached per fitted pipeline so each model is flattened once
+_compiled = weakref.WeakKeyDictionary()
+
+
+def compile_model(model):
+    if isinstance(model, CompiledForest):
+        return model
+    compiled = _compiled.get(model)
+    if compiled is None:
+        compiled = _compiled[model] = CompiledForest.from_pipeline(model)
+    return compiled
+
+
+# The compiled forest persisted next to its pipeline artifact. sklearn trees copy
+# their nodes into private buffers when unpickled, but every array here is plain
+# NumPy, so worker processes that load this file with mmap_mode='r' share one
+# physical copy of the trees through the page cache.
+def compiled_path(model_path):
+    return os.path.splitext(model_path)[0] + '.compiled.pkl'
+
+
+# Load the shared compiled artifact for model_path through registry, writing it
+# first if it is missing or older than the pipeline. The pipeline is only loaded
+# (or model used) when the compiled file has to be rebuilt, and then read from
+# disk just for compiling: it never enters the registry, so the process keeps
+# only the compiled trees, and a rewritten pipeline file is always what's compiled.
+def load_shared(model_path, registry, model=None):
+    path = compiled_path(model_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path):
+        if model is None:
+            model = joblib.load(model_path)
+        save_model(compile_model(model), path)
+    registry.refresh(path)
+    return registry.get(path)
+
+
+# Largest absolute difference between the compiled and sklearn probabilities for X
+def check_parity(model, X, compiled=None):
+    compiled = compiled or compile_model(model)
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    if list(compiled.classes_) != list(model.classes_):
+        raise AssertionError("Compiled model has different classes")
+    return float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+
+
+# python fast_inference.py [model.pkl]
+# Checks the compiled engine against model.predict_proba on the bundled dataset
+# and compares single-row and batch latency of the two paths.
+def main(argv=None):
+    import career_model
+
+    argv = sys.argv[1:] if argv is None else argv
+    model_path = argv[0] if argv else None
+    data = career_model.load_data()
+    model = career_model.get_model(data, model_path, backend='sklearn')
+    X = data.drop(columns=['StudentID', 'Career_Path'], errors='ignore')
+
+    compiled = compile_model(model)
+    diff = check_parity(model, X, compiled)
+    single_rows = X.head(200).to_dict('records')
+    row_diff = max(
+        float(np.max(np.abs(model.predict_proba(pd.DataFrame([row]))[0] - compiled.predict_proba_row(row))))
+        for row in single_rows[:20]
+    )
+    print(f"Parity on {len(X):,} rows: max |difference| = {diff:.3g} (single rows: {row_diff:.3g})")
+
+    for label, predict in [('sklearn', lambda row: model.predict_proba(pd.DataFrame([row]))),
+                           ('compiled', compiled.predict_proba_row)]:
+        start = time.perf_counter()
+        for row in single_rows:
+            predict(row)
+        per_row = (time.perf_counter() - start) / len(single_rows)
+        start = time.perf_counter()
+        (model if label == 'sklearn' else compiled).predict_proba(X)
+        batch = time.perf_counter() - start
+        print(f"{label:>8}: {per_row * 1e3:.3f} ms per single row, {len(X) / batch:,.0f} rows/s in batch")
+
+    if diff != 0.0 or row_diff != 0.0:
+        sys.exit("Compiled engine does not match sklearn")
+
+
+if __name__ == '__main__':
+    main()
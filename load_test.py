@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import career_model
+
+STUDENT_SAMPLE = 1000
+
+
+# Request bodies built from students in the bundled dataset
+def make_bodies(batch_size, top_n, count=STUDENT_SAMPLE, data_path=career_model.DATA_PATH):
+    data = pd.read_csv(data_path).drop(columns=career_model.COLUMNS_TO_DROP + ['StudentID', career_model.TARGET_COL],
+                                       errors='ignore')
+    students = data.sample(n=min(count, len(data)), random_state=0).to_dict('records')
+    students = [{col: (value.item() if hasattr(value, 'item') else value) for col, value in row.items()} for row in students]
+    if batch_size == 1:
+        return '/predict', [json.dumps({'student': student, 'top_n': top_n}).encode() for student in students]
+    batches = [students[i:i + batch_size] for i in range(0, len(students), batch_size)]
+    return '/predict/batch', [json.dumps({'students': batch, 'top_n': top_n}).encode() for batch in batches]
+
+
+async def post(reader, writer, host, path, body):
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':', 1)[1]) for line in lines[1:] if line.lower().startswith('content-length:'))
+    await reader.readexactly(length)
+    return status
+
+
+# One keep-alive connection sending requests back to back until the deadline
+async def client(host, port, path, bodies, offset, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await post(reader, writer, host, path, bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, concurrency, duration, batch_size, top_n):
+    path, bodies = make_bodies(batch_size, top_n)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, path, bodies, i * 7, deadline, latencies, errors)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+# python load_test.py [--port 8080] [--concurrency 50] [--duration 10] [--batch-size 1]
+# Drives a running prediction_service.py and reports requests per second and latency.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test a running prediction service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--concurrency', type=int, default=50, help="concurrent keep-alive connections")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to run")
+    parser.add_argument('--batch-size', type=int, default=1, help="students per request (>1 uses /predict/batch)")
+    parser.add_argument('--top-n', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    latencies, errors, elapsed = asyncio.run(
+        run(args.host, args.port, args.concurrency, args.duration, args.batch_size, args.top_n))
+    if not latencies:
+        sys.exit("No requests completed")
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(f"{len(latencies):,} requests in {elapsed:.1f}s: {len(latencies) / elapsed:,.0f} req/s, "
+          f"{len(latencies) * args.batch_size / elapsed:,.0f} students/s")
+    print(f"latency p50 {p50:.1f}ms, p95 {p95:.1f}ms, p99 {p99:.1f}ms; {len(errors)} non-200 responses")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import multiprocessing
+import sys
+
+import joblib
+
+import career_model
+from fast_inference import compiled_path
+
+MODES = {
+    # Every worker unpickles its own copy of the pipeline
+    'private': (lambda model_path: model_path, None),
+    # Every worker maps the same compiled artifact read-only
+    'shared': (compiled_path, 'r'),
+}
+
+
+# Resident, proportional (shared pages split between the processes mapping
+# them) and private memory of this process in MB. PSS and private memory come
+# from /proc and are None off Linux.
+def memory_usage():
+    usage = {'rss': None, 'pss': None, 'private': None}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.split()[-1] == 'kB'}
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['rss'] = rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+        return usage
+    usage['rss'] = fields['Rss'] / 1024
+    usage['pss'] = fields['Pss'] / 1024
+    usage['private'] = (fields['Private_Clean'] + fields['Private_Dirty']) / 1024
+    return usage
+
+
+# Load the model the way a server worker would, run it over X so every tree page
+# is touched, then report memory once all workers hold their model at once
+def worker(mode, model_path, X, barrier, results):
+    path_for, mmap_mode = MODES[mode]
+    before = memory_usage()
+    model = joblib.load(path_for(model_path), mmap_mode=mmap_mode)
+    model.predict_proba(X)
+    barrier.wait()
+    after = memory_usage()
+    results.put({'before': before, 'after': after})
+    barrier.wait()
+
+
+def measure(mode, model_path, X, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, model_path, X, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    usages = [results.get() for _ in processes]
+    barrier.wait()
+    for process in processes:
+        process.join()
+    return usages
+
+
+def total(usages, key):
+    values = [usage['after'][key] for usage in usages]
+    return sum(values) if None not in values else None
+
+
+def format_mb(value):
+    return f'{value:>9.0f}MB' if value is not None else f"{'n/a':>11}"
+
+
+# python memory_report.py [--workers 4] [--model model.pkl]
+# Starts N worker processes that each load the model, without sharing (private
+# unpickled pipelines) and with sharing (one memory-mapped compiled artifact),
+# and prints per-worker and total memory for both.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare worker memory with and without a shared model artifact.")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--model', default=None, help="model artifact (default: the one matching the current dataset and code)")
+    args = parser.parse_args(argv)
+
+    data = career_model.load_data()
+    career_model.get_model(data, args.model, backend='compiled')  # make sure both artifacts exist
+    model_path = args.model or career_model.current_model_path()
+    X = data.drop(columns=['StudentID', career_model.TARGET_COL], errors='ignore').head(2000)
+
+    print(f"{'mode':>8} {'worker':>7} {'model RSS':>11} {'RSS':>11} {'PSS':>11} {'private':>11}")
+    totals = {}
+    for mode in MODES:
+        usages = measure(mode, model_path, X, args.workers)
+        for i, usage in enumerate(usages):
+            model_rss = usage['after']['rss'] - usage['before']['rss']
+            print(f"{mode:>8} {i:>7} {format_mb(model_rss)} {format_mb(usage['after']['rss'])} "
+                  f"{format_mb(usage['after']['pss'])} {format_mb(usage['after']['private'])}")
+        totals[mode] = {key: total(usages, key) for key in ('rss', 'pss', 'private')}
+        print(f"{mode:>8} {'total':>7} {'':>11} {format_mb(totals[mode]['rss'])} "
+              f"{format_mb(totals[mode]['pss'])} {format_mb(totals[mode]['private'])}")
+    if totals['private']['pss'] and totals['shared']['pss']:
+        saved = totals['private']['pss'] - totals['shared']['pss']
+        print(f"Sharing saves {saved:.0f}MB of {totals['private']['pss']:.0f}MB total PSS across {args.workers} workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import bisect
+import cProfile
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Where metrics are exported (both off unless set): a Prometheus text file,
+# rewritten at most every METRICS_FILE_INTERVAL seconds, and/or a local
+# HTTP endpoint serving /metrics
+METRICS_FILE = os.environ.get('CAREER_METRICS_FILE')
+METRICS_PORT = int(os.environ.get('CAREER_METRICS_PORT', 0))
+METRICS_FILE_INTERVAL = 5.0
+
+# Detailed mode: when CAREER_PROFILE_DIR is set every request is run under
+# cProfile and requests slower than CAREER_PROFILE_SLOW_MS are dumped there
+PROFILE_DIR = os.environ.get('CAREER_PROFILE_DIR')
+PROFILE_SLOW_SECONDS = float(os.environ.get('CAREER_PROFILE_SLOW_MS', 500)) / 1000
+
+# Latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+# Base for metrics whose samples are keyed by a sorted tuple of label pairs
+class Metric:
+    type = None
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{format_labels(labels)} {format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+
+# Counter or gauge whose value is read from a callback at export time
+class CallbackMetric(Metric):
+    def __init__(self, name, help, type, callback):
+        super().__init__(name, help)
+        self.type = type
+        self.callback = callback
+
+    def render(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}',
+                f'{self.name} {format_value(self.callback())}']
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    # Samples are [per-bucket counts..., +Inf count, sum]
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = [0] * (len(self.buckets) + 2)
+            sample[index] += 1
+            sample[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted((labels, list(sample)) for labels, sample in self._values.items())
+        for labels, sample in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), sample):
+                cumulative += count
+                bucket_labels = labels + (('le', format_value(bound)),)
+                lines.append(f'{self.name}_bucket{format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(sample[-1])}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {cumulative}')
+        return lines
+
+
+# Process-wide set of metrics. Metrics are created once by name and shared, so
+# any module can record into them without holding a reference.
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = factory()
+        return metric
+
+    def counter(self, name, help):
+        return self._get_or_create(name, lambda: Counter(name, help))
+
+    def gauge(self, name, help):
+        return self._get_or_create(name, lambda: Gauge(name, help))
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets))
+
+    def callback(self, name, help, type, callback):
+        return self._get_or_create(name, lambda: CallbackMetric(name, help, type, callback))
+
+    # All metrics in the Prometheus text exposition format
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for _, metric in metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+    # Atomically replace path with the current metrics
+    def write(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+# Shared instance used by the app
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram('career_stage_seconds', 'Time spent in each stage of a page run')
+request_seconds = registry.histogram('career_request_seconds', 'Time for a whole Recommendation page run')
+profiles_written = registry.counter('career_profiles_written_total', 'Slow requests dumped by the profiler')
+
+
+# Time a block into the stage histogram
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=name)
+
+
+_last_file_write = 0.0
+
+
+# Time a whole request. In detailed mode the request is also profiled and the
+# profile kept if it was slow. Exports to METRICS_FILE when it is due.
+@contextmanager
+def request(name='recommendation'):
+    global _last_file_write
+    profiler = None
+    if PROFILE_DIR:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another request on this interpreter is already being profiled
+            profiler = None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            if elapsed >= PROFILE_SLOW_SECONDS:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                stamp = time.strftime('%Y%m%d-%H%M%S')
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f'{name}-{stamp}-{elapsed * 1e3:.0f}ms-{threading.get_ident()}.prof'))
+                profiles_written.inc()
+        request_seconds.observe(elapsed, request=name)
+        if METRICS_FILE and time.monotonic() - _last_file_write >= METRICS_FILE_INTERVAL:
+            _last_file_write = time.monotonic()
+            registry.write(METRICS_FILE)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# None until serve() first runs; False if the port was taken
+_server = None
+_server_lock = threading.Lock()
+
+
+# Serve /metrics on localhost in a daemon thread (once per process).
+# Returns the server, or None when no port is configured.
+def serve(port=METRICS_PORT, host='127.0.0.1'):
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            except OSError:  # another worker process already serves this port
+                _server = False
+            else:
+                threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _server or None
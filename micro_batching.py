@@ -0,0 +1,147 @@
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from career_model import CATEGORICAL_COLS, predict_careers
+
+# How long the scheduler waits for more requests after the first one arrives,
+# and the most rows it puts in one predict_proba call. A wait of 0 turns
+# batching off: predict() then calls the model directly.
+DEFAULT_MAX_WAIT = float(os.environ.get('CAREER_MICROBATCH_WAIT_MS', 2)) / 1000
+DEFAULT_MAX_BATCH = int(os.environ.get('CAREER_MICROBATCH_MAX_SIZE', 64))
+
+batch_sizes = metrics.registry.histogram('career_microbatch_size', 'Rows per coalesced predict_proba call',
+                                         buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+queue_wait_seconds = metrics.registry.histogram('career_microbatch_wait_seconds',
+                                                'Time a prediction request waited in the batching queue')
+batch_failures = metrics.registry.counter('career_microbatch_failures_total',
+                                          'Coalesced predict_proba calls that failed and were retried row by row')
+
+# Up to this many rows, a compiled forest's rows are transformed one by one
+# rather than through a DataFrame
+ROW_TRANSFORM_LIMIT = 256
+
+
+# Raise ValueError unless row has every numeric input as a finite number. One NaN
+# or infinity makes predict_proba fail for the whole batch it is scored in.
+def check_row(row, model):
+    for col in model.feature_names_in_:
+        if col in CATEGORICAL_COLS:
+            continue
+        if col not in row:
+            raise ValueError(f"Missing field: {col}")
+        try:
+            finite = math.isfinite(row[col])
+        except TypeError:
+            finite = False
+        if not finite:
+            raise ValueError(f"{col} must be a finite number")
+
+
+# Class probabilities for a list of student dicts, timed in the same stages as
+# predict_careers(). The compiled forest stacks its per-row transform, which is
+# much cheaper than building a DataFrame for a few rows.
+def predict_rows(rows, model):
+    if hasattr(model, 'transform_row') and len(rows) <= ROW_TRANSFORM_LIMIT:
+        with metrics.stage('build_frame'):
+            Xt = np.vstack([model.transform_row(row) for row in rows])
+        with metrics.stage('predict_proba'):
+            return model.predict_proba_transformed(Xt)
+    with metrics.stage('build_frame'):
+        X = pd.DataFrame(rows, columns=list(model.feature_names_in_))
+    with metrics.stage('predict_proba'):
+        return model.predict_proba(X)
+
+
+# Full rankings for a batch of rows, in the same order and with the same tie
+# breaking as predict_careers(): highest probability first, ties in class order
+def rank_rows(rows, model):
+    probas = predict_rows(rows, model)
+    classes = model.classes_
+    order = np.argsort(-probas, axis=1, kind='stable')
+    return [[(classes[i], probas[r][i]) for i in order[r]] for r in range(len(rows))]
+
+
+# Shared scheduler that coalesces concurrent single-student predictions.
+# Sessions block in predict() while a daemon thread gathers requests for up to
+# max_wait seconds (or max_batch rows), runs one predict_proba per model, and
+# hands each session its own row's ranking.
+class MicroBatcher:
+    def __init__(self, max_wait=DEFAULT_MAX_WAIT, max_batch=DEFAULT_MAX_BATCH):
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # Same result as predict_careers(student_data, model, top_n). Models with a
+    # single-row path (the compiled forest) score one row in less time than the
+    # queue wait, so they are called directly.
+    def predict(self, student_data, model, top_n=3):
+        if self.max_wait <= 0 or self.max_batch <= 1 or hasattr(model, 'predict_proba_row'):
+            return predict_careers(student_data, model, top_n)
+        return self.submit(student_data, model).result()[:top_n]
+
+    # Queue a prediction; the returned Future resolves to the full ranking.
+    # Raises ValueError for a row that would fail its batch (see check_row).
+    def submit(self, student_data, model):
+        check_row(student_data, model)
+        self._ensure_started()
+        future = Future()
+        self._queue.put((time.perf_counter(), student_data, model, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        started = time.perf_counter()
+        by_model = {}
+        for queued, student_data, model, future in batch:
+            queue_wait_seconds.observe(started - queued)
+            by_model.setdefault(id(model), (model, []))[1].append((student_data, future))
+        for model, requests in by_model.values():
+            batch_sizes.observe(len(requests))
+            try:
+                rankings = rank_rows([student_data for student_data, _ in requests], model)
+            except Exception:
+                # Score the rows one by one so only the ones that fail get the error
+                batch_failures.inc()
+                for student_data, future in requests:
+                    try:
+                        future.set_result(rank_rows([student_data], model)[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            for (_, future), ranking in zip(requests, rankings):
+                future.set_result(ranking)
+
+
+# Shared instance used by the app
+batcher = MicroBatcher()
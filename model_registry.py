@@ -0,0 +1,164 @@
+import os
+import tempfile
+import threading
+import joblib
+import numpy as np
+
+import metrics
+
+# Memory-map the model's numpy arrays instead of copying them into each process
+# (set CAREER_MODEL_MMAP=0 to load fully into memory)
+DEFAULT_MMAP_MODE = 'r' if os.environ.get('CAREER_MODEL_MMAP', '1') != '0' else None
+
+
+# Version of an artifact on disk; changes whenever the file is rewritten
+def artifact_version(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Bytes of array data a loaded model holds, found by walking its attributes:
+# NumPy arrays (memory-mapped ones count too; serving touches every page) and the
+# node buffers sklearn's trees and KD-trees keep outside NumPy
+def model_nbytes(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if type(obj).__module__.startswith('sklearn.tree'):
+        from sklearn.tree._tree import NODE_DTYPE, Tree
+        if isinstance(obj, Tree):
+            return obj.capacity * NODE_DTYPE.itemsize + obj.value.nbytes
+    if type(obj).__module__.startswith('sklearn.neighbors') and hasattr(obj, 'get_arrays'):
+        return sum(array.nbytes for array in obj.get_arrays())
+    if isinstance(obj, dict):
+        return sum(model_nbytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(model_nbytes(value, seen) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return model_nbytes(vars(obj), seen)
+    return 0
+
+
+# Write a model so readers never see a partial file: dump to a temp file in the
+# same directory, flush it to disk, then atomically rename it over path
+def save_model(model, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(model, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Process-wide cache of loaded model artifacts.
+# Every Streamlit session runs in the same process, so each artifact version is
+# unpickled once and the same handle is shared by all sessions. Handles are
+# shared: callers must treat them as read-only (memory-mapped arrays are).
+# kind names the registry's metrics (career_<kind>_loads_total, ...), so each
+# registry reports only its own artifacts.
+class ModelRegistry:
+    def __init__(self, mmap_mode=DEFAULT_MMAP_MODE, kind='model'):
+        self.mmap_mode = mmap_mode
+        label = kind.replace('_', ' ').capitalize()
+        self.loads = metrics.registry.counter(f'career_{kind}_loads_total', f'{label} artifacts loaded from disk')
+        self.hits = metrics.registry.counter(f'career_{kind}_registry_hits_total', f'{label} lookups served by the registry')
+        self.size = metrics.registry.gauge(f'career_{kind}_bytes',
+                                           f'Array memory of the {label.lower()} artifacts the registry is serving')
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._sizes = {}
+        self._warmups = {}
+
+    # Return the loaded model for path, loading it on first use
+    def get(self, path):
+        entry = self._entries.get(path)
+        if entry is not None:
+            self.hits.inc()
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._load(path)
+            else:
+                self.hits.inc()
+            return entry[1]
+
+    # Version of the currently loaded artifact, or None if not loaded
+    def version(self, path):
+        entry = self._entries.get(path)
+        return entry[0] if entry is not None else None
+
+    def is_loaded(self, path):
+        return path in self._entries
+
+    # Publish an already-built model (e.g. right after training) for path
+    def register(self, path, model):
+        with self._lock:
+            self._entries[path] = (artifact_version(path), model)
+            self._sizes[path] = model_nbytes(model)
+            self._update_size()
+        return model
+
+    # Unconditionally reload path from disk
+    def reload(self, path):
+        with self._lock:
+            return self._load(path)[1]
+
+    # Reload path only if the file on disk has changed since it was loaded.
+    # Returns True when a new version was loaded.
+    def refresh(self, path):
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == artifact_version(path):
+                return False
+            self._load(path)
+            return True
+
+    def evict(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+            self._sizes.pop(path, None)
+            self._update_size()
+
+    # Start loading path in a background thread so the first request doesn't pay for it
+    def warm_up(self, path):
+        if path in self._entries or not os.path.exists(path):
+            return None
+        with self._lock:
+            thread = self._warmups.get(path)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=self.get, args=(path,), name=f'warm-up {path}', daemon=True)
+                self._warmups[path] = thread
+                thread.start()
+        return thread
+
+    # Must be called with self._lock held
+    def _load(self, path):
+        version = artifact_version(path)
+        model = joblib.load(path, mmap_mode=self.mmap_mode)
+        entry = (version, model)
+        self._entries[path] = entry
+        self._sizes[path] = model_nbytes(model)
+        self.loads.inc()
+        self._update_size()
+        return entry
+
+    # Must be called with self._lock held
+    def _update_size(self):
+        self.size.set(sum(self._sizes.values()))
+
+
+# Shared instance used by the app
+registry = ModelRegistry()
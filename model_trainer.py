@@ -0,0 +1,138 @@
+import errno
+import os
+import threading
+import time
+import traceback
+
+import career_model
+from model_registry import registry
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Inter-process lock held while a model is being trained, so concurrent visitors
+# and worker processes never fit the same model twice
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking=True):
+        f = open(self.path, 'a+')
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                fcntl.flock(f.fileno(), flags)
+            elif blocking:
+                # LK_LOCK gives up after about 10 one-second retries; keep waiting
+                # until the holder is done rather than train without the lock
+                while True:
+                    f.seek(0)
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError as e:
+                        if e.errno != errno.EDEADLOCK:
+                            raise
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise OSError(f"Could not lock {self.path}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def lock_path(model_path):
+    return model_path + '.lock'
+
+
+# Train a model under the training lock. If another process finished training
+# while we waited for the lock, its artifact is loaded instead of fitting again.
+def train_exclusive(data, model_path=None, force=False):
+    model_path = model_path or career_model.base_model_path()
+    os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+    with FileLock(lock_path(model_path)):
+        if not force and os.path.exists(model_path):
+            return registry.reload(model_path)
+        return registry.register(model_path, career_model.train_model(data, model_path))
+
+
+# Runs training in a daemon thread and hot-swaps the result into the registry.
+# Sessions keep being served by the previously loaded model (if any) until the
+# new artifact has been written and published.
+class BackgroundTrainer:
+    IDLE = 'idle'
+    TRAINING = 'training'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    # model_path=None follows the artifact matching the current manifest
+    def __init__(self, model_path=None):
+        self.model_path = model_path
+        self.state = self.IDLE
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Start training unless a run is already in progress. Returns the worker thread.
+    def start(self, data, force=False):
+        with self._lock:
+            if not self.running:
+                self.state = self.TRAINING
+                self.error = None
+                self.started_at = time.time()
+                self.finished_at = None
+                self._thread = threading.Thread(target=self._run, args=(data, force), name='model-trainer', daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.state
+
+    def _run(self, data, force):
+        try:
+            train_exclusive(data, self.model_path or career_model.base_model_path(), force=force)
+            self.state = self.READY
+        except Exception:
+            self.error = traceback.format_exc()
+            self.state = self.FAILED
+        finally:
+            self.finished_at = time.time()
+
+
+# Shared instance used by the app
+trainer = BackgroundTrainer()
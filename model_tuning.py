@@ -0,0 +1,165 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+import artifacts
+import career_model
+import estimators
+from fast_inference import compile_model
+
+DEFAULT_ESTIMATORS = [25, 50, 100, 150]
+DEFAULT_MAX_DEPTHS = [None, 8, 12, 16]
+DEFAULT_MIN_SAMPLES_LEAF = [1, 2, 5]
+
+# Forest settings the sweep varies
+SWEPT_PARAMS = ('n_estimators', 'max_depth', 'min_samples_leaf')
+
+# Accept a setting whose held-out accuracy is at most this far below the
+# default random forest's
+DEFAULT_TOLERANCE = 0.01
+
+LATENCY_ROWS = 300
+
+
+# Bytes of node and value arrays held by the forest's trees
+def forest_nbytes(model):
+    total = 0
+    for estimator in model.named_steps['classifier'].estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
+
+
+# Per-request latency of predict_careers on single rows, in seconds
+def single_row_latencies(model, X, rows=LATENCY_ROWS):
+    records = X.head(rows).to_dict('records')
+    samples = []
+    for record in records:
+        start = time.perf_counter()
+        career_model.predict_careers(record, model)
+        samples.append(time.perf_counter() - start)
+    return np.asarray(samples)
+
+
+# Fit one setting on the training split and score it on the held-out split
+def evaluate(model_params, X_train, X_test, y_train, y_test, workdir):
+    started = time.perf_counter()
+    model = career_model.build_pipeline(X_train.columns, model_params, 'random_forest').fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    probas = model.predict_proba(X_test)
+    classes = np.asarray(model.classes_)
+    y = np.asarray(y_test)
+    top3 = classes[np.argsort(-probas, axis=1, kind='stable')[:, :3]]
+
+    path = os.path.join(workdir, 'model.pkl')
+    joblib.dump(model, path)
+    sklearn_latency = single_row_latencies(model, X_test)
+    compiled_latency = single_row_latencies(compile_model(model), X_test)
+    return {
+        'params': model_params,
+        'accuracy': float(np.mean(classes[np.argmax(probas, axis=1)] == y)),
+        'top3_accuracy': float(np.mean((top3 == y[:, np.newaxis]).any(axis=1))),
+        'artifact_bytes': os.path.getsize(path),
+        'tree_bytes': forest_nbytes(model),
+        'nodes': int(sum(e.tree_.node_count for e in model.named_steps['classifier'].estimators_)),
+        'fit_seconds': fit_seconds,
+        'p99_ms': float(np.percentile(sklearn_latency, 99) * 1e3),
+        'compiled_p99_ms': float(np.percentile(compiled_latency, 99) * 1e3),
+    }
+
+
+def sweep(data, n_estimators=DEFAULT_ESTIMATORS, max_depths=DEFAULT_MAX_DEPTHS,
+          min_samples_leaf=DEFAULT_MIN_SAMPLES_LEAF, quiet=False):
+    X_train, X_test, y_train, y_test = career_model.split_data(data)
+    defaults = estimators.default_params('random_forest')
+    settings = [defaults]
+    seen = [effective_params(defaults)]
+    for n, depth, leaf in itertools.product(n_estimators, max_depths, min_samples_leaf):
+        params = {**defaults, 'n_estimators': n, 'max_depth': depth, 'min_samples_leaf': leaf}
+        if effective_params(params) not in seen:
+            settings.append(params)
+            seen.append(effective_params(params))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='career-tuning-') as workdir:
+        for i, params in enumerate(settings):
+            if not quiet:
+                print(f"[{i + 1}/{len(settings)}] {format_params(params)}", file=sys.stderr)
+            results.append(evaluate(params, X_train, X_test, y_train, y_test, workdir))
+    return results
+
+
+# Smallest artifact whose accuracy is within tolerance of the default forest's
+# (results[0] is always the default random_forest parameters)
+def choose(results, tolerance=DEFAULT_TOLERANCE):
+    floor = results[0]['accuracy'] - tolerance
+    eligible = [result for result in results if result['accuracy'] >= floor]
+    return min(eligible, key=lambda result: (result['artifact_bytes'], result['p99_ms']))
+
+
+# The swept settings of a forest, with sklearn's defaults filled in for any
+# params leaves out (so the default forest shows min_samples_leaf=1, not None)
+def effective_params(params):
+    full = estimators.make_estimator('random_forest', params).get_params()
+    return {name: full[name] for name in SWEPT_PARAMS}
+
+
+def format_params(params):
+    return ' '.join(f'{name}={value}' for name, value in effective_params(params).items())
+
+
+def print_report(results, chosen):
+    print(f"{'setting':<44} {'accuracy':>9} {'top-3':>7} {'artifact':>10} {'trees':>10} {'p99':>9} {'compiled':>9}")
+    for result in sorted(results, key=lambda result: result['artifact_bytes']):
+        marker = '*' if result is chosen else ('=' if result is results[0] else ' ')
+        print(f"{marker}{format_params(result['params']):<43} {result['accuracy']:>9.3f} {result['top3_accuracy']:>7.3f} "
+              f"{result['artifact_bytes'] / 1024 ** 2:>8.1f}MB {result['tree_bytes'] / 1024 ** 2:>8.1f}MB "
+              f"{result['p99_ms']:>7.2f}ms {result['compiled_p99_ms']:>7.2f}ms")
+    print("= default random_forest parameters, * smallest within tolerance")
+
+
+# python model_tuning.py [--tolerance 0.01] [--output tuning.json] [--export]
+# Sweeps tree count, max depth and min samples per leaf on the held-out split and
+# reports accuracy, top-3 accuracy, size and p99 single-row latency. --export
+# trains the chosen setting into its content-addressed artifact.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trade model size and latency against held-out accuracy.")
+    parser.add_argument('--estimators', type=int, nargs='+', default=DEFAULT_ESTIMATORS)
+    parser.add_argument('--max-depths', type=lambda v: None if v == 'none' else int(v), nargs='+',
+                        default=DEFAULT_MAX_DEPTHS, help="max_depth values ('none' for unlimited)")
+    parser.add_argument('--min-samples-leaf', type=int, nargs='+', default=DEFAULT_MIN_SAMPLES_LEAF)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed accuracy drop from the default forest")
+    parser.add_argument('--output', help="write all results as JSON")
+    parser.add_argument('--export', action='store_true', help="train and save the chosen model")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    args = parser.parse_args(argv)
+
+    data = career_model.load_data()
+    results = sweep(data, args.estimators, args.max_depths, args.min_samples_leaf, args.quiet)
+    chosen = choose(results, args.tolerance)
+    print_report(results, chosen)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'tolerance': args.tolerance, 'chosen': chosen, 'results': results}, f, indent=2)
+
+    print(f"Chosen: {format_params(chosen['params'])} (accuracy {chosen['accuracy']:.3f} vs "
+          f"{results[0]['accuracy']:.3f}, {chosen['artifact_bytes'] / results[0]['artifact_bytes']:.0%} of the size)")
+    if args.export:
+        manifest = career_model.model_manifest(model_params=chosen['params'], estimator='random_forest')
+        model_path = artifacts.artifact_path(manifest)
+        career_model.train_model(data, model_path, model_params=chosen['params'], estimator='random_forest')
+        print(f"Exported to {model_path}; set the random_forest defaults in estimators.py to "
+              f"{chosen['params']!r} to serve it")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import career_model
+import dataset_cache
+from batch_scoring import check_columns, feature_columns
+from model_registry import registry, save_model
+from model_trainer import FileLock, lock_path
+
+# Trees fitted on each batch of new outcomes, and the most the forest may hold;
+# beyond that the oldest trees are retired first
+TREES_PER_UPDATE = int(os.environ.get('CAREER_UPDATE_TREES', 25))
+MAX_TREES = int(os.environ.get('CAREER_MAX_TREES', career_model.MODEL_PARAMS.get('n_estimators', 150)))
+
+
+# Read a batch of newly labelled outcomes: the model's input columns plus the target
+def read_batch(path, model):
+    batch = pd.read_csv(path)
+    check_columns(batch.columns, model)
+    if career_model.TARGET_COL not in batch.columns:
+        raise ValueError(f"Missing column: {career_model.TARGET_COL}")
+    batch = batch.dropna(subset=[career_model.TARGET_COL])
+    if batch.empty:
+        raise ValueError("Batch has no labelled rows")
+    return batch[feature_columns(model)], batch[career_model.TARGET_COL].astype(str)
+
+
+# Give a tree fitted on a subset of the classes the forest's full class list:
+# forests average their trees' probability columns position by position, so a
+# tree's value table is widened with zero columns for the classes it never saw
+def widen_tree(estimator, columns, n_classes):
+    from sklearn.tree._tree import Tree
+
+    tree = estimator.tree_
+    state = tree.__getstate__()
+    values = np.zeros((tree.node_count, 1, n_classes), dtype=state['values'].dtype)
+    values[:, 0, columns] = state['values'][:, 0, :]
+    widened = Tree(tree.n_features, np.array([n_classes], dtype=np.intp), 1)
+    widened.__setstate__({**state, 'values': values})
+    estimator.tree_ = widened
+    estimator.classes_ = np.arange(n_classes, dtype=np.float64)
+    estimator.n_classes_ = n_classes
+    return estimator
+
+
+# A new pipeline sharing model's fitted preprocessing, with trees fitted on
+# (X, y) only appended to the forest and the oldest trees retired so it holds
+# at most max_trees. model itself (a shared registry handle) is not modified.
+# Returns (pipeline, trees added, trees retired).
+def grow_forest(model, X, y, trees=TREES_PER_UPDATE, max_trees=MAX_TREES, random_state=None):
+    from sklearn.base import clone
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+
+    preprocessor = model.named_steps['preprocessor']
+    forest = model.named_steps['classifier']
+    if not isinstance(forest, RandomForestClassifier):
+        raise ValueError("Incremental updates need a random_forest model")
+    classes = np.asarray(forest.classes_)
+    unseen = sorted(set(y) - set(classes))
+    if unseen:
+        raise ValueError(f"Batch has careers the model has never seen ({', '.join(unseen)}); retrain instead")
+
+    grown = clone(forest).set_params(n_estimators=trees, random_state=random_state, warm_start=False)
+    grown.fit(preprocessor.transform(X), y)
+    columns = np.searchsorted(classes, grown.classes_)
+    new_trees = [widen_tree(tree, columns, len(classes)) for tree in grown.estimators_]
+
+    updated = copy.copy(forest)
+    updated.estimators_ = (list(forest.estimators_) + new_trees)[-max_trees:]
+    updated.n_estimators = len(updated.estimators_)
+    retired = len(forest.estimators_) + len(new_trees) - len(updated.estimators_)
+    return Pipeline(steps=[('preprocessor', preprocessor), ('classifier', updated)]), len(new_trees), retired
+
+
+# Apply one batch of new outcomes to the model currently served for data_path
+# and publish the result as the next version. Work is proportional to the batch,
+# not to the full history. A batch that was already applied is skipped.
+# Returns the version entry (None when skipped).
+def apply_update(batch_path, data_path=career_model.DATA_PATH, trees=TREES_PER_UPDATE, max_trees=MAX_TREES):
+    base_path = career_model.base_model_path(data_path)
+    if not os.path.exists(base_path):
+        raise FileNotFoundError(f"No base model at {base_path}; train one first")
+    batch_hash = dataset_cache.file_hash(batch_path)
+
+    with FileLock(lock_path(base_path)):
+        versions = artifacts.read_versions(base_path)
+        if any(entry['batch_sha256'] == batch_hash for entry in versions):
+            return None
+        parent_path = artifacts.latest_version(base_path)
+        model = registry.get(parent_path)
+        X, y = read_batch(batch_path, model)
+
+        started = time.perf_counter()
+        seed = career_model.MODEL_PARAMS.get('random_state', 0) + len(versions) + 1
+        updated, added, retired = grow_forest(model, X, y, trees, max_trees, seed)
+
+        manifest = artifacts.read_manifest(base_path)
+        manifest['updates'] = [entry['batch_sha256'] for entry in versions] + [batch_hash]
+        manifest['hyperparameters'] = {**manifest['hyperparameters'], 'update': {'trees': trees, 'max_trees': max_trees}}
+        path = artifacts.artifact_path(manifest)
+        save_model(updated, path)
+        artifacts.write_manifest(path, manifest)
+        entry = {
+            'version': len(versions) + 1,
+            'path': path,
+            'parent': parent_path,
+            'batch': os.path.basename(batch_path),
+            'batch_sha256': batch_hash,
+            'rows': int(len(X)),
+            'trees_added': added,
+            'trees_retired': retired,
+            'n_estimators': updated.named_steps['classifier'].n_estimators,
+            'seconds': time.perf_counter() - started,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+        artifacts.append_version(base_path, entry)
+        registry.register(path, updated)
+    return entry
+
+
+# python model_updates.py apply new_outcomes.csv [more.csv ...] [--trees 25] [--max-trees 150]
+# python model_updates.py log
+# Batches are applied in the order given; each publishes a new model version that
+# every app process picks up on its next request.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the career model from newly labelled outcomes.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    apply_parser = subparsers.add_parser('apply', help="apply batches of labelled outcomes")
+    apply_parser.add_argument('batches', nargs='+', help="CSV files with the dataset's columns, including Career_Path")
+    apply_parser.add_argument('--trees', type=int, default=TREES_PER_UPDATE, help="trees fitted per batch")
+    apply_parser.add_argument('--max-trees', type=int, default=MAX_TREES, help="oldest trees are retired beyond this")
+    subparsers.add_parser('log', help="list the model versions")
+    args = parser.parse_args(argv)
+
+    base_path = career_model.base_model_path()
+    if args.command == 'log':
+        print(f"base: {base_path}")
+        for entry in artifacts.read_versions(base_path):
+            print(f"v{entry['version']:<4} {entry['created']}  {entry['batch']:<28} {entry['rows']:>8,} rows  "
+                  f"+{entry['trees_added']}/-{entry['trees_retired']} trees = {entry['n_estimators']:<4} {entry['path']}")
+        return
+
+    for batch_path in args.batches:
+        try:
+            entry = apply_update(batch_path, trees=args.trees, max_trees=args.max_trees)
+        except (ValueError, FileNotFoundError) as e:
+            sys.exit(f"{batch_path}: {e}")
+        if entry is None:
+            print(f"{batch_path}: already applied, skipped")
+        else:
+            print(f"{batch_path}: v{entry['version']} from {entry['rows']:,} rows in {entry['seconds']:.1f}s "
+                  f"(+{entry['trees_added']}/-{entry['trees_retired']} trees) -> {entry['path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelRegistry, save_model
+
+DEFAULT_NEIGHBOURS = 5
+LEAF_SIZE = 40
+
+# KD-trees copy their arrays when unpickled, so memory-mapping buys nothing;
+# indexes get their own registry that loads them fully (and its own metrics)
+index_registry = ModelRegistry(mmap_mode=None, kind='neighbour_index')
+
+
+# The neighbour index persisted next to its pipeline artifact
+def neighbours_path(model_path):
+    return os.path.splitext(model_path)[0] + '.neighbours.pkl'
+
+
+# "Students like you": a KD-tree over the dataset's standardized subject scores,
+# with every student's career stored as a code into careers. Raw scores are not
+# kept separately; they are recovered from the tree's own copy of the data.
+class NeighbourIndex:
+    def __init__(self, subjects, mean, scale, tree, careers, career_codes, row_ids):
+        self.subjects = list(subjects)
+        self.mean = mean
+        self.scale = scale
+        self.tree = tree
+        self.careers = careers
+        self.career_codes = career_codes
+        self.row_ids = row_ids
+
+    # Build from a dataset with the subject columns and the target column;
+    # row_ids (e.g. StudentIDs) label the rows, defaulting to data.index
+    @classmethod
+    def build(cls, data, subjects, target_col, row_ids=None, leaf_size=LEAF_SIZE):
+        from sklearn.neighbors import KDTree
+
+        scores = data[list(subjects)].to_numpy(dtype=np.float64)
+        mean = scores.mean(axis=0)
+        scale = scores.std(axis=0)
+        scale[scale == 0.0] = 1.0
+        codes, careers = pd.factorize(data[target_col].astype(str), sort=True)
+        return cls(subjects, mean, scale, KDTree((scores - mean) / scale, leaf_size=leaf_size),
+                   np.asarray(careers, dtype=object), codes.astype(np.int16),
+                   np.asarray(data.index if row_ids is None else row_ids))
+
+    def __len__(self):
+        return len(self.career_codes)
+
+    def _standardize(self, X):
+        # A single profile skips pandas, which costs more than the query itself
+        if isinstance(X, dict):
+            return (np.array([[X[col] for col in self.subjects]], dtype=np.float64) - self.mean) / self.scale
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(X)
+        return (X[self.subjects].to_numpy(dtype=np.float64) - self.mean) / self.scale
+
+    # k nearest students for every row of X (DataFrame, list of dicts or one dict):
+    # (distances, positions), each shape (rows, k), nearest first
+    def query(self, X, k=DEFAULT_NEIGHBOURS):
+        return self.tree.query(self._standardize(X), k=min(k, len(self)))
+
+    # The k students most similar to one profile: their scores, career and distance
+    def similar_students(self, student_data, k=DEFAULT_NEIGHBOURS):
+        distances, positions = self.query(student_data, k)
+        positions = positions[0]
+        data = self.tree.get_arrays()[0]
+        result = pd.DataFrame(np.rint(data[positions] * self.scale + self.mean).astype(int), columns=self.subjects,
+                              index=self.row_ids[positions])
+        result.insert(0, 'Career_Path', self.careers[self.career_codes[positions]])
+        result.insert(1, 'Distance', distances[0].round(3))
+        return result
+
+    # Most common career among each row's k nearest students and the share of
+    # those students who took it (ties go to the career first in sorted order)
+    def peer_careers(self, X, k=DEFAULT_NEIGHBOURS):
+        _, positions = self.query(X, k)
+        n_rows, n_careers = len(positions), len(self.careers)
+        slots = (np.arange(n_rows)[:, np.newaxis] * n_careers + self.career_codes[positions]).ravel()
+        counts = np.bincount(slots, minlength=n_rows * n_careers).reshape(n_rows, n_careers)
+        best = np.argmax(counts, axis=1)
+        return self.careers[best], counts[np.arange(n_rows), best] / positions.shape[1]
+
+
+# Load the neighbour index for model_path through registry, writing build()
+# first if the index is missing or older than the pipeline
+def load_index(model_path, build, registry=index_registry):
+    path = neighbours_path(model_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path):
+        save_model(build(), path)
+    registry.refresh(path)
+    return registry.get(path)
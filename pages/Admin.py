@@ -0,0 +1,83 @@
+import streamlit as st
+import hmac
+import os
+import pandas as pd
+import career_model
+import evaluation
+import metrics
+
+# Set page configuration
+st.set_page_config(
+    page_title="Model Evaluation",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="collapsed",
+)
+
+# Processes a cross-validation started from this page may use; the serving host
+# keeps its other cores for students (the CLI defaults to all of them)
+ADMIN_JOBS = int(os.environ.get('CAREER_ADMIN_JOBS', 2))
+
+# The page sits in the students' sidebar, so it stays closed unless
+# CAREER_ADMIN_PASSWORD is set and entered
+def authorized():
+    password = os.environ.get('CAREER_ADMIN_PASSWORD')
+    if not password:
+        st.info("The admin page is disabled. Set CAREER_ADMIN_PASSWORD to enable it.")
+        return False
+    entered = st.text_input("Admin password", type="password")
+    return hmac.compare_digest(entered.encode(), password.encode())
+
+# Cross-validation results, cached on disk by dataset and hyperparameter fingerprint
+def show_results(results, cached):
+    source = "cached" if cached else f"computed in {results['seconds']:.1f}s"
+    st.caption(f"{results['folds']}-fold cross-validation on {results['rows']:,} students ({source})")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Accuracy", f"{results['accuracy']:.1%}")
+    col2.metric("Top-3 accuracy", f"{results['top3_accuracy']:.1%}")
+    col3.metric("Calibration error (ECE)", f"{results['expected_calibration_error']:.3f}")
+
+    st.markdown("#### Per career")
+    per_class = pd.DataFrame({
+        name: {key: stats[key] for key in ('precision', 'recall', 'f1', 'brier', 'support')}
+        for name, stats in results['per_class'].items()
+    }).T
+    st.dataframe(per_class.style.format({'precision': '{:.3f}', 'recall': '{:.3f}', 'f1': '{:.3f}',
+                                         'brier': '{:.4f}', 'support': '{:.0f}'}), use_container_width=True)
+
+    st.markdown("#### Confusion matrix (rows: actual, columns: predicted)")
+    st.dataframe(pd.DataFrame(results['confusion_matrix'], index=results['classes'], columns=results['classes']),
+                 use_container_width=True)
+
+    st.markdown("#### Calibration")
+    career = st.selectbox("Career", results['classes'])
+    curve = pd.DataFrame(results['per_class'][career]['calibration'])
+    if not curve.empty:
+        curve = curve.set_index('predicted')[['observed']]
+        curve['perfect'] = curve.index
+        st.line_chart(curve)
+
+# Main app
+def main():
+    st.title("Model Evaluation")
+    if not authorized():
+        st.stop()
+
+    folds = st.number_input("Folds", min_value=2, max_value=20, value=evaluation.DEFAULT_FOLDS, step=1)
+    st.write(f"Estimator: `{career_model.ESTIMATOR}` with `{career_model.MODEL_PARAMS}`")
+
+    # Only cached results are shown until an evaluation is asked for
+    results = evaluation.load_results(evaluation.evaluation_manifest(folds=int(folds)))
+    cached = results is not None
+    if st.button("Re-run evaluation" if cached else "Run evaluation"):
+        with st.spinner("Cross-validating (folds run in parallel)..."):
+            results, cached = evaluation.evaluate(folds=int(folds), n_jobs=ADMIN_JOBS, force=True)
+    if results is None:
+        st.info("No evaluation for this dataset and these hyperparameters yet.")
+        return
+    show_results(results, cached)
+
+if __name__ == "__main__":
+    with metrics.request('admin'):
+        main()
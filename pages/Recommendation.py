@@ -1,12 +1,19 @@
 import streamlit as st
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-import joblib
+import assets
+import html
 import os
+import pandas as pd
+import tempfile
+import time
+import career_model
+import dataset_cache
+import metrics
+from prediction_cache import cached_predict_careers
+from model_registry import registry
+from model_trainer import trainer
+from batch_scoring import count_rows, score_csv
+from whatif import sensitivity_grid, relevant_careers
+from explanations import top_drivers
 
 # Set page configuration
 st.set_page_config(
@@ -16,178 +23,49 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-# Custom CSS matching the homepage colors with centered button
+# Shared stylesheet (static/style.css) with this page's rules switched on
 def local_css():
-    st.markdown("""
-    <style>
-    .main {
-        padding: 20px;
-    }
-    /* Remove the gradient background and match the homepage */
-    .stApp {
-        background-color: #f8f9fa;
-    }
-    h1 {
-        color: #20c997;
-        font-weight: bold;
-        padding-bottom: 20px;
-        margin-bottom: 30px;
-        text-align: center;
-    }
-    h2, h3 {
-        color: #495057;
-        margin-top: 30px;
-    }
-    .subject-input {
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 20px;
-    }
-    .recommendation-card {
-        background-color: white;
-        border-radius: 10px;
-        padding: 20px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-top: 10px;
-        border-left: 5px solid #6c757d;
-    }
-    .top-recommendation {
-        border-left: 5px solid #20c997;
-    }
-    .stButton>button {
-        background-color: #20c997;
-        color: white;
-        font-weight: bold;
-        border-radius: 5px;
-        padding: 0.75rem 1.5rem;
-        border: none;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        font-size: 18px;
-        cursor: pointer;
-    }
-    .stButton>button:hover {
-        opacity: 0.9;
-        box-shadow: 0 6px 8px rgba(0, 0, 0, 0.15);
-        transition: all 0.3s ease;
-    }
-    .title {
-        color: #20c997;
-        text-align: center;
-        font-size: calc(1.8rem + 1vw) !important;
-        margin-bottom: 20px;
-    }
-    .subtitle {
-        color: #495057;
-        text-align: center;
-        font-size: calc(1.2rem + 0.5vw) !important;
-        margin-bottom: 30px;
-    }
-    .stRadio > div {
-        padding: 10px;
-        background-color: white;
-        border-radius: 5px;
-        margin-bottom: 10px;
-    }
-    /* Form field styling to match homepage */
-    .stNumberInput > div > div > input {
-        border: 1px solid #ced4da;
-        border-radius: 5px;
-    }
-    .stSelectbox > div > div {
-        border: 1px solid #ced4da;
-        border-radius: 5px;
-    }
-    /* Footer styling */
-    .footer {
-        text-align: center;
-        color: #6c757d;
-        padding-top: 50px;
-        font-size: 0.8em;
-    }
-    /* Center the button */
-    .button-container {
-        display: flex;
-        justify-content: center;
-        margin-top: 20px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    assets.inject_styles('recommendation')
+
+# Load data (memory-mapped once and shared read-only by all sessions). The
+# cache is keyed on the CSV's version, the same key the model path is derived
+# from, so an edited dataset is re-read before a model is trained for it.
+@st.cache_resource(max_entries=1)
+def load_dataset(file_key):
+    return career_model.load_data()
 
-# Load data
-@st.cache_data
 def load_data():
-    data = pd.read_csv('waec_subjects_career_dataset.csv')
-    
-    # Drop specified columns
-    columns_to_drop = [
-        'Study_Habits', 'Analytical_Thinking', 'Creative_Thinking', 
-        'Communication_Skills', 'Practical_Skills', 'Science_Club', 
-        'Debate_Club'
-    ]
-    
-    for col in columns_to_drop:
-        if col in data.columns:
-            data = data.drop(col, axis=1)
-            
-    return data
-
-# Train model
-@st.cache_resource
-def train_model(data):
-    # Prepare features and target
-    X = data.drop(['StudentID', 'Career_Path'], axis=1)
-    y = data['Career_Path']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Define categorical and numerical columns
-    categorical_cols = ['Learning_Style', 'Gender']
-    numerical_cols = [col for col in X.columns if col not in categorical_cols]
-    
-    # Create preprocessing pipelines
-    numerical_transformer = Pipeline(steps=[('scaler', StandardScaler())])
-    categorical_transformer = Pipeline(steps=[('onehot', OneHotEncoder(handle_unknown='ignore'))])
-    
-    # Combine preprocessing steps
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numerical_transformer, numerical_cols),
-            ('cat', categorical_transformer, categorical_cols)
-        ])
-    
-    # Create the modeling pipeline
-    model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('classifier', RandomForestClassifier(n_estimators=150, random_state=42))
-    ])
-    
-    # Train the model
-    model.fit(X_train, y_train)
-    
-    # Save model
-    joblib.dump(model, 'career_recommendation_model.pkl')
-    
-    return model
+    return load_dataset(dataset_cache.file_key(career_model.DATA_PATH))
 
-# Load or train model
+# Load the model, or start training it in the background if there is none yet.
+# Returns None while the first model is still being trained.
+# The artifact path is derived from the dataset/code manifest, so a changed
+# dataset or upgraded library switches to (and trains) a new artifact.
 def get_model(data):
-    model_path = 'career_recommendation_model.pkl'
-    if os.path.exists(model_path):
-        return joblib.load(model_path)
-    else:
-        return train_model(data)
-
-# Predict careers
-def predict_careers(student_data, model, top_n=3):
-    student_df = pd.DataFrame([student_data])
-    probas = model.predict_proba(student_df)
-    classes = model.classes_
-    career_probs = [(classes[i], probas[0][i]) for i in range(len(classes))]
-    career_probs.sort(key=lambda x: x[1], reverse=True)
-    return career_probs[:top_n]
+    model_path = career_model.current_model_path()
+    if registry.is_loaded(model_path):
+        # Pick up a model retrained by another process (the compiled backend
+        # notices on its own and never loads the pipeline)
+        registry.refresh(model_path)
+    if registry.is_loaded(model_path) or os.path.exists(model_path):
+        model = career_model.get_model(data, model_path)
+        career_model.retire_previous(model_path)
+        return model
+    if trainer.state != trainer.FAILED:
+        trainer.start(data)
+    return None
+
+# Shown instead of the form until the first model is ready
+def warming_up(data):
+    if trainer.state == trainer.FAILED:
+        st.error("The recommendation model could not be trained.")
+        if st.button("Try Again"):
+            trainer.start(data)
+            st.rerun()
+        st.stop()
+    st.info("⏳ The recommendation model is warming up. This only happens once and takes less than a minute...")
+    trainer.wait(timeout=2)
+    st.rerun()
 
 # Map learning style from user-friendly to technical terms
 def map_learning_style(user_choice):
@@ -202,72 +80,206 @@ def map_learning_style(user_choice):
     }
     return mapping[user_choice]
 
-# Career emoji mapping
-def get_career_emoji(career):
-    emoji_map = {
-        'Computer_Science': '💻',
-        'Engineering': '🔧',
-        'Medicine': '⚕️',
-        'Business': '📊',
-        'Arts_Humanities': '🎨',
-        'Social_Sciences': '🌍',
-        'Education': '📚',
-        'Law': '⚖️',
-        'Natural_Sciences': '🔬',
-        'Technical_Vocational': '🛠️'
-    }
-    return emoji_map.get(career, '📝')
+# Emoji and description for each career
+CAREER_INFO = {
+    'Computer_Science': ('💻', "A career in Computer Science involves software development, system analysis, and solving complex problems with technology."),
+    'Engineering': ('🔧', "Engineers design, build and maintain structures, machines, systems, and processes using scientific principles."),
+    'Medicine': ('⚕️', "Medical professionals diagnose, treat, and prevent illness, disease, and injury in patients."),
+    'Business': ('📊', "Business careers involve managing organizations, marketing products, analyzing finances, and developing strategies."),
+    'Arts_Humanities': ('🎨', "Careers in arts and humanities focus on creative expression, cultural understanding, and communication."),
+    'Social_Sciences': ('🌍', "Social scientists study human behavior, relationships, societies, and cultures to understand social patterns."),
+    'Education': ('📚', "Educators teach, mentor, and develop learning programs to help students acquire knowledge and skills."),
+    'Law': ('⚖️', "Legal professionals interpret laws, analyze cases, represent clients, and ensure justice is properly served."),
+    'Natural_Sciences': ('🔬', "Natural scientists study the physical world through observation, experimentation, and theoretical analysis."),
+    'Technical_Vocational': ('🛠️', "Technical careers involve specialized skills in areas like construction, manufacturing, and technical services."),
+}
+DEFAULT_CAREER_INFO = ('📝', "")
+
+# The whole results block as one HTML string, so a submission sends a single
+# element instead of several per career
+def results_html(recommendations, drivers):
+    parts = ["<h3 class='results-title'>Your Recommended Career Paths</h3>",
+             "<p>Based on your academic performance, here are your top career matches:</p>"]
+    for i, (career, prob) in enumerate(recommendations):
+        emoji, description = CAREER_INFO.get(career, DEFAULT_CAREER_INFO)
+        card_class = "recommendation-card top-recommendation" if i == 0 else "recommendation-card"
+        title = f"{i + 1}. {emoji} {html.escape(career.replace('_', ' '))}" + (" - Top Match!" if i == 0 else "")
+        parts.append(f'<div class="{card_class}"><h4>{title}</h4>'
+                     f'<div class="confidence-bar"><div style="width: {prob:.1%}"></div></div>'
+                     f'<p>Confidence: {prob:.1%}</p>')
+        if drivers:
+            parts.append(f'<p class="drivers">What drove this: {html.escape(format_drivers(drivers[career]))}</p>')
+        if description:
+            parts.append(f'<p>{description}</p>')
+        parts.append('</div>')
+    return "".join(parts)
+
+# Top inputs behind each recommended career, from precomputed tree path
+# contributions. Empty when the serving model isn't a random forest.
+def explain_recommendations(student_data, model, careers):
+    try:
+        return top_drivers(student_data, model, careers, k=3)
+    except ValueError:
+        return {}
+
+
+def format_drivers(drivers):
+    return ", ".join(f"{name.replace('_', ' ')} {value * 100:+.0f} pts" for name, value in drivers)
+
+
+# Show how career probabilities move as one or two subjects vary over 0-100,
+# scoring the whole grid in one batched predict_proba call
+def what_if(student_data, model, subject_cols):
+    st.markdown("#### What if my scores changed?")
+    subjects = st.multiselect("Subjects to vary (one or two)", subject_cols, default=subject_cols[:1],
+                              max_selections=2, key="whatif_subjects")
+    if not subjects:
+        return
+
+    with metrics.stage('what_if'):
+        grid = sensitivity_grid(student_data, model, subjects)
+    current = ", ".join(f"{subject.replace('_', ' ')}: {student_data[subject]}" for subject in subjects)
+
+    if len(subjects) == 1:
+        careers = relevant_careers(grid, subjects)
+        st.line_chart(grid.set_index(subjects[0])[careers])
+        st.caption(f"Your current score ({current}); every other input is kept as you entered it.")
+        return
+
+    import altair as alt
+    careers = relevant_careers(grid, subjects)
+    career = st.selectbox("Career", careers, key="whatif_career", format_func=lambda c: c.replace('_', ' '))
+    chart = alt.Chart(grid[subjects + [career]]).mark_rect().encode(
+        x=alt.X(f"{subjects[0]}:O", axis=alt.Axis(values=list(range(0, 101, 10)))),
+        y=alt.Y(f"{subjects[1]}:O", sort='descending', axis=alt.Axis(values=list(range(0, 101, 10)))),
+        color=alt.Color(f"{career}:Q", title="Probability", scale=alt.Scale(scheme='tealblues')),
+        tooltip=subjects + [alt.Tooltip(f"{career}:Q", format='.1%')],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.caption(f"Probability of {career.replace('_', ' ')} (your current scores: {current}).")
+
+# Real students from the dataset whose subject scores are closest to the
+# submitted ones, and the careers they went on to (k-NN on the prebuilt index)
+def students_like_you(student_data, neighbours):
+    st.markdown("#### Students like you")
+    similar = neighbours.similar_students(student_data, k=5)
+    st.write("These students had the most similar WAEC scores:")
+    st.dataframe(similar.rename_axis("Student"), use_container_width=True)
+    counts = similar['Career_Path'].value_counts()
+    st.caption("They went on to: " + ", ".join(f"{career.replace('_', ' ')} ({n})" for career, n in counts.items()))
+
+# Score a whole cohort from an uploaded results CSV
+# Scored cohort files live in their own directory and are deleted once they are
+# older than RESULTS_MAX_AGE, so sessions that end without scoring again don't
+# leave them behind
+RESULTS_DIR = os.environ.get('CAREER_RESULTS_DIR', os.path.join(tempfile.gettempdir(), 'career-cohort-results'))
+RESULTS_MAX_AGE = float(os.environ.get('CAREER_RESULTS_MAX_AGE_MINUTES', 60)) * 60
+
+def sweep_results(now=None):
+    now = now or time.time()
+    for entry in os.scandir(RESULTS_DIR):
+        try:
+            if entry.is_file() and now - entry.stat().st_mtime > RESULTS_MAX_AGE:
+                os.remove(entry.path)
+        except FileNotFoundError:  # removed by another session's sweep
+            pass
+
+def cohort_scoring(model, neighbours=None):
+    st.markdown("#### Score a whole cohort")
+    st.write("Upload a CSV with the same columns as the WAEC dataset to get recommendations for every student.")
+
+    uploaded = st.file_uploader("Cohort results CSV", type="csv", key="cohort_csv")
+    top_n = st.slider("Recommendations per student", min_value=1, max_value=len(model.classes_), value=3, key="cohort_top_n")
+
+    if uploaded is None:
+        return
+
+    if st.button("Score Cohort", key="score_cohort"):
+        total_rows = count_rows(uploaded)
+        progress = st.progress(0.0, text="Scoring students...")
+
+        def report(rows_done):
+            progress.progress(min(rows_done / max(total_rows, 1), 1.0), text=f"Scored {rows_done:,} of {total_rows:,} students")
+
+        # Results are streamed to a temporary file so memory stays bounded
+        previous = st.session_state.pop("cohort_results", None)
+        if previous and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        sweep_results()
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False, dir=RESULTS_DIR) as output:
+            try:
+                rows = score_csv(uploaded, model, output, top_n=top_n, progress=report, neighbours=neighbours)
+            except ValueError as e:
+                st.error(f"Could not score this file: {e}")
+                rows = None
+        if rows is None:
+            os.remove(output.name)
+            return
+        st.session_state["cohort_results"] = {"path": output.name, "rows": rows, "name": uploaded.name}
+
+    results = st.session_state.get("cohort_results")
+    if results and not os.path.exists(results["path"]):
+        st.info("These results have expired. Score the cohort again to download them.")
+    elif results:
+        st.success(f"Scored {results['rows']:,} students from {results['name']}")
+        with open(results["path"], "rb") as f:
+            st.download_button(
+                "Download Recommendations",
+                data=f,
+                file_name=f"recommendations_{results['name']}",
+                mime="text/csv",
+                key="cohort_download",
+            )
 
 # Main app
 def main():
+    # Start loading the model while the page renders
+    registry.warm_up(career_model.serving_path())
+
     # Apply custom CSS
     local_css()
     
     # App header with logo and title using the homepage styling
     col1, col2 = st.columns([1, 5])
     with col1:
-        st.image("https://img.icons8.com/ios-filled/100/20c997/graduation-cap.png", width=80)
+        st.markdown(assets.image_html("logo.svg", "Graduation cap", "logo"), unsafe_allow_html=True)
     with col2:
         st.markdown("<h1 class='title'>Career Path Recommendation System</h1>", unsafe_allow_html=True)
     
     st.markdown("<h2 class='subtitle'>Find your ideal career based on WAEC examination results</h2>", unsafe_allow_html=True)
     
     # Load data
-    data = load_data()
+    with metrics.stage('load_data'):
+        data = load_data()
     
     # Automatically train/load model in the background
-    model = get_model(data)
+    with metrics.stage('get_model'):
+        model = get_model(data)
+    if model is None:
+        warming_up(data)
+    with metrics.stage('get_neighbours'):
+        neighbours = career_model.get_neighbours(data)
     
     # Get subject names
     subject_cols = [col for col in data.columns if col not in ['StudentID', 'Career_Path', 'Gender', 'Learning_Style']]
     
-    # Create a card-like container for the form
-    st.markdown('<div class="subject-input">', unsafe_allow_html=True)
+    # Scores are entered in one editable table: a single widget instead of one per subject
+    score_table = pd.DataFrame({"Subject": [col.replace('_', ' ') for col in subject_cols], "Score": 70})
     
     # Create a form for input
     with st.form("student_form"):
-        st.markdown("#### Enter your WAEC examination scores")
-        st.write("Enter scores for each subject (0-100)")
-        
-        student_data = {}
-        
-        # Create three columns for better layout
-        cols = st.columns(3)
+        st.markdown("#### Enter your WAEC examination scores\nEnter scores for each subject (0-100)")
         
-        # Split subjects among columns
-        subjects_per_col = len(subject_cols) // 3 + 1
-        
-        for i, subject in enumerate(subject_cols):
-            col_idx = i // subjects_per_col
-            with cols[col_idx]:
-                student_data[subject] = st.number_input(
-                    f"{subject}", 
-                    min_value=0, 
-                    max_value=100, 
-                    value=70, 
-                    step=1,
-                    key=f"input_{subject}"
-                )
+        scores = st.data_editor(
+            score_table,
+            key="scores",
+            hide_index=True,
+            disabled=["Subject"],
+            use_container_width=True,
+            column_config={"Score": st.column_config.NumberColumn(min_value=0, max_value=100, step=1, required=True)},
+        )
+        student_data = {subject: int(score) for subject, score in zip(subject_cols, scores["Score"])}
         
         st.markdown("#### Learning Preferences")
         
@@ -288,61 +300,34 @@ def main():
         # Gender with a more compact layout
         student_data['Gender'] = st.selectbox("Gender", ["Male", "Female"])
         
-        # Submit button with proper centering using a custom container
-        st.markdown('<div class="button-container">', unsafe_allow_html=True)
+        # Submit button (centered by the stylesheet)
         submitted = st.form_submit_button("Get My Career Recommendations")
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
     
     if submitted:
-        # Predict careers
-        recommendations = predict_careers(student_data, model)
-        
-        # Display recommendations with nice formatting
-        st.markdown("<h3 style='text-align: center; color: #495057;'>Your Recommended Career Paths</h3>", unsafe_allow_html=True)
-        st.write("Based on your academic performance, here are your top career matches:")
+        # Remembered so the what-if panel keeps working across reruns
+        st.session_state["student_data"] = dict(student_data)
+
+        # Predict careers (identical submissions are served from the shared cache)
+        with metrics.stage('predict'):
+            recommendations = cached_predict_careers(student_data, model)
+
+        # Inputs that pushed each recommended career up or down
+        with metrics.stage('explain'):
+            drivers = explain_recommendations(student_data, model, [career for career, _ in recommendations])
         
-        # Display each recommendation as a card
-        for i, (career, prob) in enumerate(recommendations):
-            emoji = get_career_emoji(career)
-            card_class = "recommendation-card top-recommendation" if i == 0 else "recommendation-card"
-            
-            st.markdown(f'<div class="{card_class}">', unsafe_allow_html=True)
-            
-            if i == 0:
-                st.markdown(f"#### {i+1}. {emoji} {career.replace('_', ' ')} - Top Match!")
-            else:
-                st.markdown(f"#### {i+1}. {emoji} {career.replace('_', ' ')}")
-            
-            # Confidence bar
-            st.progress(float(prob))
-            st.write(f"Confidence: {prob:.1%}")
-            
-            # Optional: Add career descriptions here
-            if career == 'Computer_Science':
-                st.write("A career in Computer Science involves software development, system analysis, and solving complex problems with technology.")
-            elif career == 'Engineering':
-                st.write("Engineers design, build and maintain structures, machines, systems, and processes using scientific principles.")
-            elif career == 'Medicine':
-                st.write("Medical professionals diagnose, treat, and prevent illness, disease, and injury in patients.")
-            elif career == 'Business':
-                st.write("Business careers involve managing organizations, marketing products, analyzing finances, and developing strategies.")
-            elif career == 'Arts_Humanities':
-                st.write("Careers in arts and humanities focus on creative expression, cultural understanding, and communication.")
-            elif career == 'Social_Sciences':
-                st.write("Social scientists study human behavior, relationships, societies, and cultures to understand social patterns.")
-            elif career == 'Education':
-                st.write("Educators teach, mentor, and develop learning programs to help students acquire knowledge and skills.")
-            elif career == 'Law':
-                st.write("Legal professionals interpret laws, analyze cases, represent clients, and ensure justice is properly served.")
-            elif career == 'Natural_Sciences':
-                st.write("Natural scientists study the physical world through observation, experimentation, and theoretical analysis.")
-            elif career == 'Technical_Vocational':
-                st.write("Technical careers involve specialized skills in areas like construction, manufacturing, and technical services.")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            st.write("")  # Add some space
+        # Display the recommendation cards in one element
+        with metrics.stage('render'):
+            st.markdown(results_html(recommendations, drivers), unsafe_allow_html=True)
+    
+    # What-if explorer for the last submitted profile
+    if "student_data" in st.session_state:
+        what_if(st.session_state["student_data"], model, subject_cols)
+        with st.expander("Students like you"):
+            students_like_you(st.session_state["student_data"], neighbours)
+    
+    # Bulk scoring for schools
+    with st.expander("Score a whole school's results at once"):
+        cohort_scoring(model, neighbours)
             
     # Footer matching the homepage style
     st.markdown("---")
@@ -353,4 +338,7 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Per-stage timings are exported when CAREER_METRICS_PORT/CAREER_METRICS_FILE is set
+    metrics.serve()
+    with metrics.request():
+        main()
\ No newline at end of file
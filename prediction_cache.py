@@ -0,0 +1,127 @@
+import itertools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import metrics
+from career_model import predict_careers
+from micro_batching import batcher
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('CAREER_PREDICTION_CACHE_SIZE', 10000))
+
+# Every model object gets its own version token, so entries computed by an older
+# (retrained or reloaded) model are never returned for a newer one
+_model_versions = weakref.WeakKeyDictionary()
+_version_counter = itertools.count(1)
+_version_lock = threading.Lock()
+
+
+def model_version(model):
+    with _version_lock:
+        version = _model_versions.get(model)
+        if version is None:
+            version = _model_versions[model] = next(_version_counter)
+        return version
+
+
+# Pack a student's inputs into a compact bytes key: one byte per integer score
+# (0-255) followed by the categorical values. Returns None for inputs that don't
+# fit that shape (e.g. fractional scores), which are simply not cached.
+def pack_key(student_data, columns):
+    scores = bytearray()
+    labels = []
+    for col in columns:
+        value = student_data[col]
+        if isinstance(value, str):
+            labels.append(value)
+            continue
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        try:
+            scores.append(value)
+        except (TypeError, ValueError):
+            return None
+    return bytes(scores) + '\x1f'.join(labels).encode()
+
+
+# Bounded LRU cache of full career rankings, shared by every session in the process.
+# Misses are computed by predictor (same signature as predict_careers).
+class PredictionCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, predictor=predict_careers):
+        self.maxsize = maxsize
+        self.predictor = predictor
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Ranked (career, probability) list for student_data, computing it on a miss
+    def predict(self, student_data, model, top_n=3):
+        key = pack_key(student_data, model.feature_names_in_)
+        if key is None or self.maxsize <= 0:
+            return self.predictor(student_data, model, top_n)
+
+        version = model_version(model)
+        with self._lock:
+            if version != self._version:
+                # A new model has been loaded; everything cached is stale
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+            ranking = self._entries.get(key)
+            if ranking is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ranking[:top_n]
+            self.misses += 1
+
+        ranking = self.predictor(student_data, model, len(model.classes_))
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = ranking
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return ranking[:top_n]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Shared instance used by the app; misses from concurrent sessions are
+# coalesced into batched predict_proba calls
+prediction_cache = PredictionCache(predictor=batcher.predict)
+
+metrics.registry.callback('career_prediction_cache_hits_total', 'Predictions served from the cache', 'counter',
+                          lambda: prediction_cache.hits)
+metrics.registry.callback('career_prediction_cache_misses_total', 'Predictions computed by the model', 'counter',
+                          lambda: prediction_cache.misses)
+metrics.registry.callback('career_prediction_cache_entries', 'Rankings held in the prediction cache', 'gauge',
+                          lambda: len(prediction_cache._entries))
+
+
+# Drop-in replacement for predict_careers() that goes through the shared cache
+def cached_predict_careers(student_data, model, top_n=3):
+    return prediction_cache.predict(student_data, model, top_n)
@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import career_model
+import metrics
+from micro_batching import rank_rows
+from model_registry import registry
+from model_trainer import train_exclusive
+from prediction_cache import cached_predict_careers
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH_ROWS = 10000
+MAX_TOP_N = 10
+
+# Range of a WAEC subject score
+MIN_SCORE = 0
+MAX_SCORE = 100
+
+ROUTES = ('/healthz', '/readyz', '/predict', '/predict/batch')
+
+# How often to pick up a model retrained by another process
+REFRESH_INTERVAL = 30.0
+
+request_seconds = metrics.registry.histogram('career_service_request_seconds', 'HTTP prediction service request time')
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Values each categorical input was trained on, for a pipeline or a compiled forest
+def known_categories(model):
+    if hasattr(model, 'categorical_cols'):
+        return dict(zip(model.categorical_cols, model.categories))
+    encoder = model.named_steps['preprocessor'].named_transformers_['cat'].named_steps['onehot']
+    return dict(zip(career_model.CATEGORICAL_COLS, encoder.categories_))
+
+
+# Check one student record against the model's inputs and keep only those:
+# scores must be finite numbers from MIN_SCORE to MAX_SCORE, categorical values
+# ones the model was trained on
+def validate_student(student, model):
+    if not isinstance(student, dict):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "each student must be a JSON object")
+    features = list(model.feature_names_in_)
+    missing = [col for col in features if col not in student]
+    if missing:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"missing fields: {', '.join(missing)}")
+    categories = known_categories(model)
+    row = {}
+    for col in features:
+        value = student[col]
+        if col in categories:
+            if not isinstance(value, str):
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"{col} must be a string")
+            if value not in list(categories[col]):
+                raise RequestError(HTTPStatus.BAD_REQUEST,
+                                   f"{col} must be one of: {', '.join(map(str, categories[col]))}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{col} must be a number")
+        elif not (math.isfinite(value) and MIN_SCORE <= value <= MAX_SCORE):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{col} must be from {MIN_SCORE} to {MAX_SCORE}")
+        row[col] = value
+    return row
+
+
+def validate_top_n(body, model):
+    top_n = body.get('top_n', 3)
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= min(MAX_TOP_N, len(model.classes_)):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"top_n must be an integer from 1 to {min(MAX_TOP_N, len(model.classes_))}")
+    return top_n
+
+
+# Same (career, probability) list as predict_careers(), as JSON
+def format_ranking(ranking):
+    return [{'career': str(career), 'probability': float(prob)} for career, prob in ranking]
+
+
+# JSON-over-HTTP prediction service on asyncio streams. Model work runs in a
+# thread pool: single predictions go through the shared prediction cache and
+# micro-batcher, batch requests through one predict_proba call.
+class PredictionService:
+    # model_path pins one artifact; by default the service follows the current
+    # model, including versions published later by model_updates.py
+    def __init__(self, model_path=None, backend=career_model.INFERENCE_BACKEND, workers=32):
+        self.pinned_path = model_path
+        self.model_path = model_path or career_model.current_model_path()
+        self.backend = backend
+        self.model = None
+        self.error = None
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='prediction')
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    # Load the shared artifact, training it under the training lock if missing
+    def load_model(self):
+        model_path = self.pinned_path or career_model.current_model_path()
+        if not os.path.exists(model_path):
+            train_exclusive(career_model.load_data(), model_path)
+        if registry.is_loaded(model_path):
+            registry.refresh(model_path)
+        self.model = career_model.get_model(None, model_path, backend=self.backend)
+        self.model_path = model_path
+        career_model.retire_previous(model_path)
+
+    async def keep_model_loaded(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self.executor, self.load_model)
+                self.error = None
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"Could not load model {self.model_path}: {self.error}", file=sys.stderr)
+            await asyncio.sleep(REFRESH_INTERVAL)
+
+    async def route(self, method, path, body):
+        if path == '/healthz':
+            return HTTPStatus.OK, {'status': 'ok'}
+        if path == '/readyz':
+            if self.ready:
+                return HTTPStatus.OK, {'status': 'ready', 'model': self.model_path}
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'status': 'loading', 'error': self.error}
+        if path not in ROUTES:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"no route for {path}")
+        if method != 'POST':
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "use POST")
+        if not self.ready:
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "model is still loading")
+
+        try:
+            body = json.loads(body or b'{}')
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "body is not valid JSON")
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "body must be a JSON object")
+        model = self.model
+        top_n = validate_top_n(body, model)
+        loop = asyncio.get_running_loop()
+
+        if path == '/predict':
+            student = validate_student(body.get('student'), model)
+            ranking = await loop.run_in_executor(self.executor, cached_predict_careers, student, model, top_n)
+            return HTTPStatus.OK, {'recommendations': format_ranking(ranking)}
+
+        students = body.get('students')
+        if not isinstance(students, list) or not students:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "students must be a non-empty list")
+        if len(students) > MAX_BATCH_ROWS:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_BATCH_ROWS} students per request")
+        rows = [validate_student(student, model) for student in students]
+        rankings = await loop.run_in_executor(self.executor, rank_rows, rows, model)
+        return HTTPStatus.OK, {'results': [{'recommendations': format_ranking(ranking[:top_n])} for ranking in rankings]}
+
+    # Serve requests on one keep-alive connection
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                started = asyncio.get_running_loop().time()
+                path = target.split('?', 1)[0]
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                body = None
+                try:
+                    if length < 0:
+                        raise RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+                    if length > MAX_BODY_BYTES:
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.route(method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception:
+                    # The details go to the log, not to the client
+                    print(f"Error handling {method} {path}:", file=sys.stderr)
+                    traceback.print_exc()
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "internal error"}
+
+                # An unread body would be parsed as the next request, so close instead
+                keep_alive = (body is not None and version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                route = path if path in ROUTES else 'other'
+                request_seconds.observe(asyncio.get_running_loop().time() - started, path=route, status=status.value)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        loader = asyncio.create_task(self.keep_model_loaded())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving predictions on http://{host}:{port} (model {self.model_path})", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            loader.cancel()
+
+
+# python prediction_service.py [--host 127.0.0.1] [--port 8080] [--backend compiled]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve career predictions over HTTP.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=None, help="model artifact (default: the one matching the current dataset and code)")
+    parser.add_argument('--backend', choices=career_model.INFERENCE_BACKENDS, default=career_model.INFERENCE_BACKEND)
+    parser.add_argument('--workers', type=int, default=32, help="threads running model work")
+    args = parser.parse_args(argv)
+
+    metrics.serve()
+    service = PredictionService(args.model, args.backend, args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
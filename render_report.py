@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import sys
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages', 'Recommendation.py')
+
+
+# Count the delta messages (one per element or container sent to the browser)
+# and their serialized bytes for every ForwardMsg the script run enqueues
+class DeltaCounter:
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def reset(self):
+        self.messages = 0
+        self.bytes = 0
+
+    def install(self):
+        from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+
+        enqueue = ForwardMsgQueue.enqueue
+        counter = self
+
+        def counting_enqueue(queue, msg):
+            if msg.HasField('delta'):
+                counter.messages += 1
+                counter.bytes += msg.ByteSize()
+            return enqueue(queue, msg)
+
+        ForwardMsgQueue.enqueue = counting_enqueue
+
+
+# Run the Recommendation page headless, then submit the form with its default
+# inputs. Returns the messages and bytes of the first load and of the submission.
+def measure(timeout=300):
+    from streamlit.testing.v1 import AppTest
+
+    sys.path.insert(0, os.path.dirname(PAGE) + os.sep + os.pardir)
+    counter = DeltaCounter()
+    counter.install()
+
+    app = AppTest.from_file(PAGE, default_timeout=timeout)
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    first_load = {'messages': counter.messages, 'bytes': counter.bytes}
+
+    counter.reset()
+    app.button[0].click().run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return {'first_load': first_load, 'submission': {'messages': counter.messages, 'bytes': counter.bytes}}
+
+
+# python render_report.py [--output render.json]
+# Websocket delta messages and bytes the Recommendation page sends on first load
+# and per form submission (the model must already be trained)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Streamlit delta messages per page run.")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = measure()
+    print(f"{'run':<12} {'messages':>9} {'bytes':>9}")
+    for run, result in results.items():
+        print(f"{run:<12} {result['messages']:>9} {result['bytes']:>9,}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
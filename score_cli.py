@@ -0,0 +1,164 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import career_model
+from batch_scoring import DEFAULT_CHUNKSIZE, ID_COLUMN, check_columns, feature_columns, predict_careers_batch
+from model_registry import ModelRegistry
+from model_trainer import train_exclusive
+
+# Model used by pool workers. With the fork start method it is inherited from the
+# parent, so every worker shares the parent's pages copy-on-write; otherwise each
+# worker maps the artifact read-only in _init_worker.
+_worker_model = None
+
+
+# Map the model read-only. With the compiled backend every worker maps the same
+# compiled artifact, so the trees are shared even under the spawn start method.
+def map_model(model_path):
+    models = ModelRegistry(mmap_mode='r')
+    model = models.get(model_path) if career_model.INFERENCE_BACKEND == 'sklearn' else None
+    return career_model.use_backend(model, model_path=model_path, registry=models)
+
+
+def _init_worker(model_path):
+    global _worker_model
+    if _worker_model is None:
+        _worker_model = map_model(model_path)
+
+
+def _score_chunk(chunk, top_n):
+    return predict_careers_batch(chunk, _worker_model, top_n)
+
+
+# Incremental CSV writer
+class CsvResultWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, results):
+        results.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+# Incremental Parquet writer, one row group per chunk (needs pyarrow)
+class ParquetResultWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            sys.exit("Writing Parquet requires pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.path = path
+        self.writer = None
+
+    def write(self, results):
+        table = self.pa.Table.from_pandas(results, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pa.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'csv': CsvResultWriter, 'parquet': ParquetResultWriter}
+
+
+# Load the model once in the parent, training it first if no artifact exists yet
+def load_model(model_path):
+    global _worker_model
+    model_path = model_path or career_model.current_model_path()
+    if not os.path.exists(model_path):
+        print(f"No model at {model_path}, training one...", file=sys.stderr)
+        train_exclusive(career_model.load_data(), model_path)
+    _worker_model = map_model(model_path)
+    return _worker_model, model_path
+
+
+def report(rows, started, final=False):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    end = '\n' if final else '\r'
+    print(f"Scored {rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)", end=end, file=sys.stderr, flush=True)
+
+
+# Score input_path into output_path. Chunks are read with read_csv and fanned out
+# to a process pool; at most 2 chunks per worker are in flight, and results are
+# written in input order as they complete. Returns the number of rows scored.
+def score_file(input_path, output_path, model_path=None, output_format='csv',
+               top_n=3, chunksize=DEFAULT_CHUNKSIZE, workers=None, quiet=False):
+    model, model_path = load_model(model_path)
+    header = pd.read_csv(input_path, nrows=0)
+    check_columns(header.columns, model)
+    usecols = feature_columns(model)
+    if ID_COLUMN in header.columns:
+        usecols = [ID_COLUMN] + usecols
+
+    workers = workers or os.cpu_count() or 1
+    writer = WRITERS[output_format](output_path)
+    chunks = pd.read_csv(input_path, usecols=usecols, chunksize=chunksize)
+    rows = 0
+    started = time.perf_counter()
+    try:
+        if workers == 1:
+            for chunk in chunks:
+                writer.write(predict_careers_batch(chunk, model, top_n))
+                rows += len(chunk)
+                if not quiet:
+                    report(rows, started)
+        else:
+            context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker, initargs=(model_path,)) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_score_chunk, chunk, top_n))
+                    while len(pending) >= 2 * workers:
+                        results = pending.popleft().result()
+                        writer.write(results)
+                        rows += len(results)
+                        if not quiet:
+                            report(rows, started)
+                while pending:
+                    results = pending.popleft().result()
+                    writer.write(results)
+                    rows += len(results)
+                    if not quiet:
+                        report(rows, started)
+    finally:
+        writer.close()
+    if not quiet:
+        report(rows, started, final=True)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a WAEC results file and write top career recommendations for every student.")
+    parser.add_argument('input', help="CSV with the same columns as waec_subjects_career_dataset.csv")
+    parser.add_argument('output', help="where to write the recommendations")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="output format (default: from the output file extension, else csv)")
+    parser.add_argument('--model', default=None, help="model artifact (default: the one matching the current dataset and code, trained if missing)")
+    parser.add_argument('--top-n', type=int, default=3, help="recommendations per student")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    args = parser.parse_args(argv)
+
+    output_format = args.format or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    score_file(args.input, args.output, args.model, output_format, args.top_n, args.chunksize, args.workers, args.quiet)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import artifacts
+import career_model
+import dataset_cache
+import estimators
+from model_registry import save_model
+from model_updates import widen_tree
+
+# Memory training may add on top of the interpreter and libraries, in MB. It is
+# split between the chunk being fitted and the finished forest: the chunk size
+# and the trees' leaf count are both derived from it.
+MEMORY_BUDGET_MB = float(os.environ.get('CAREER_STREAM_MEMORY_MB', 256))
+
+# Share of the budget reserved for the forest's trees
+FOREST_SHARE = 0.5
+
+# Memory the CSV parser and the allocator take whatever the chunk size (measured
+# at about 40MB); it comes off the budget before the rest is split
+FIXED_OVERHEAD_MB = 48
+MIN_BUDGET_MB = FIXED_OVERHEAD_MB + 16
+
+# Every HOLDOUT_EVERY-th row is held out for evaluation and never trained on
+HOLDOUT_EVERY = 5
+
+# Bytes per row are estimated from a sample chunk and multiplied by this to
+# cover the CSV parser's buffers, the transformed copy and the tree builder's
+# working arrays (measured at about 6x the chunk's own size)
+MEMORY_OVERHEAD = 8.0
+SAMPLE_ROWS = 10000
+
+
+# Import what training uses up front, so a baseline taken afterwards leaves the
+# libraries out of the memory charged to the budget
+def load_libraries():
+    import sklearn.compose  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+    import sklearn.preprocessing  # noqa: F401
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != 'darwin' else rss / 1024 ** 2
+
+
+# Most leaves per tree that keep n_trees trees within forest_mb. A tree with L
+# leaves has 2L - 1 nodes, each a node record plus its class probabilities.
+def leaves_per_tree(forest_mb, n_trees, n_classes):
+    from sklearn.tree._tree import NODE_DTYPE
+
+    node_bytes = NODE_DTYPE.itemsize + 8 * n_classes
+    return max(2, int((forest_mb * 1024 ** 2 / max(n_trees, 1) / node_bytes + 1) // 2))
+
+
+def read_options(csv_path):
+    columns = dataset_cache.read_columns(csv_path)
+    usecols = [col for col in columns if col not in career_model.COLUMNS_TO_DROP]
+    dtype = {col: (str if col in career_model.CATEGORICAL_COLS + [career_model.TARGET_COL] else np.float32)
+             for col in usecols}
+    return {'usecols': usecols, 'dtype': dtype}
+
+
+# Rows per chunk so that a chunk, its transformed copy and the tree builder's
+# working arrays stay within budget_mb
+def chunk_rows(csv_path, budget_mb=MEMORY_BUDGET_MB):
+    sample = pd.read_csv(csv_path, nrows=SAMPLE_ROWS, **read_options(csv_path))
+    bytes_per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    return max(1000, int(budget_mb * 1024 ** 2 / (bytes_per_row * MEMORY_OVERHEAD)))
+
+
+def iter_chunks(csv_path, rows):
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=rows, **read_options(csv_path)):
+        chunk.index = np.arange(start, start + len(chunk))
+        start += len(chunk)
+        chunk = chunk.dropna(subset=[career_model.TARGET_COL])
+        holdout = chunk.index % HOLDOUT_EVERY == 0
+        yield chunk[~holdout], chunk[holdout]
+
+
+def split_xy(chunk):
+    return chunk.drop(columns=[career_model.TARGET_COL]), chunk[career_model.TARGET_COL]
+
+
+# First pass: scaler statistics, category and class sets, one example row per
+# career (so the forest knows every class) and the number of training chunks
+def scan(csv_path, rows):
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    categories = {col: set() for col in career_model.CATEGORICAL_COLS}
+    exemplars = {}
+    chunks = 0
+    numerical_cols = None
+    for train, _ in iter_chunks(csv_path, rows):
+        if train.empty:
+            continue
+        X, y = split_xy(train)
+        numerical_cols = [col for col in X.columns if col not in career_model.CATEGORICAL_COLS]
+        scaler.partial_fit(X[numerical_cols].to_numpy(dtype=np.float64))
+        for col in categories:
+            categories[col].update(X[col].dropna().unique())
+        for row, career in y.drop_duplicates().items():
+            exemplars.setdefault(career, X.loc[[row]])
+        chunks += 1
+    if not chunks:
+        raise ValueError(f"{csv_path} has no labelled rows")
+    exemplars = pd.concat(list(exemplars.values())), pd.Series(list(exemplars.keys()))
+    return scaler, {col: sorted(values) for col, values in categories.items()}, exemplars, chunks
+
+
+# Train a random forest on a CSV larger than memory. The scaler and encoder are
+# fitted on the whole file in a first pass; in the second, each chunk gets its
+# share of the n_estimators trees, bootstrapped from that chunk only. Memory is
+# bounded by the chunk size and the trees' leaf limit, not by the file size.
+def train_streaming(csv_path, model_params=career_model.MODEL_PARAMS, budget_mb=MEMORY_BUDGET_MB, quiet=False):
+    if budget_mb < MIN_BUDGET_MB:
+        raise ValueError(f"The memory budget must be at least {MIN_BUDGET_MB}MB")
+    usable_mb = budget_mb - FIXED_OVERHEAD_MB
+    rows = chunk_rows(csv_path, usable_mb * (1 - FOREST_SHARE))
+    scaler, categories, (X_ex, y_ex), n_chunks = scan(csv_path, rows)
+    n_estimators = model_params.get('n_estimators', 100)
+    max_leaves = leaves_per_tree(usable_mb * FOREST_SHARE, n_estimators, len(y_ex))
+    if model_params.get('max_leaf_nodes'):
+        max_leaves = min(max_leaves, model_params['max_leaf_nodes'])
+
+    model = career_model.build_pipeline(X_ex.columns, model_params, 'random_forest')
+    model.set_params(preprocessor__cat__onehot__categories=[categories[col] for col in career_model.CATEGORICAL_COLS])
+    preprocessor = model.named_steps['preprocessor'].fit(X_ex)
+    fitted_scaler = preprocessor.named_transformers_['num'].named_steps['scaler']
+    for attr in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+        setattr(fitted_scaler, attr, getattr(scaler, attr))
+
+    # The forest is fitted on the exemplars to get every class; its trees are then
+    # replaced with the ones grown chunk by chunk
+    forest = model.named_steps['classifier'].set_params(n_estimators=1)
+    forest.fit(preprocessor.transform(X_ex), y_ex)
+    classes = np.asarray(forest.classes_)
+
+    trees_per_chunk = np.diff(np.linspace(0, n_estimators, n_chunks + 1).round().astype(int))
+    seed = model_params.get('random_state', 0)
+    trees = []
+    i = 0
+    for train, _ in iter_chunks(csv_path, rows):
+        if train.empty:
+            continue
+        if trees_per_chunk[i]:
+            X, y = split_xy(train)
+            chunk_forest = estimators.make_estimator(
+                'random_forest', {**model_params, 'n_estimators': int(trees_per_chunk[i]), 'random_state': seed + i,
+                                  'max_leaf_nodes': max_leaves})
+            chunk_forest.fit(preprocessor.transform(X), y)
+            columns = np.searchsorted(classes, chunk_forest.classes_)
+            trees += [widen_tree(tree, columns, len(classes)) for tree in chunk_forest.estimators_]
+        i += 1
+        if not quiet:
+            print(f"chunk {i}/{n_chunks}: {len(trees)} trees, peak RSS {peak_rss_mb() or 0:.0f}MB", file=sys.stderr)
+
+    forest.estimators_ = trees
+    forest.n_estimators = len(trees)
+    return model, {'chunk_rows': rows, 'chunks': n_chunks, 'trees': len(trees), 'max_leaf_nodes': max_leaves}
+
+
+# Accuracy and top-3 accuracy on the held-out rows, scored chunk by chunk
+def holdout_accuracy(model, csv_path, rows):
+    classes = np.asarray(model.classes_)
+    correct = top3 = total = 0
+    for _, holdout in iter_chunks(csv_path, rows):
+        if holdout.empty:
+            continue
+        X, y = split_xy(holdout)
+        ranked = classes[np.argsort(-model.predict_proba(X), axis=1, kind='stable')[:, :3]]
+        y = y.to_numpy()
+        correct += int((ranked[:, 0] == y).sum())
+        top3 += int((ranked == y[:, np.newaxis]).any(axis=1).sum())
+        total += len(y)
+    return {'rows': total, 'accuracy': correct / total if total else None, 'top3_accuracy': top3 / total if total else None}
+
+
+# The usual in-memory fit on the same training rows, for comparison
+def train_in_memory(csv_path, model_params=career_model.MODEL_PARAMS):
+    data = pd.read_csv(csv_path, **read_options(csv_path))
+    data.index = np.arange(len(data))
+    data = data.dropna(subset=[career_model.TARGET_COL])
+    X, y = split_xy(data[data.index % HOLDOUT_EVERY != 0])
+    return career_model.build_pipeline(X.columns, model_params, 'random_forest').fit(X, y)
+
+
+# python streaming_training.py [data.csv] [--memory-mb 256] [--compare] [--output report.json]
+# Trains the random forest out of core with chunk sizes derived from the memory
+# budget and saves it as a content-addressed artifact. --compare also fits the
+# in-memory baseline (the file must fit in RAM) and reports both accuracies.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the career model on a CSV larger than memory.")
+    parser.add_argument('csv', nargs='?', default=career_model.DATA_PATH)
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_BUDGET_MB, help="memory budget for the chunks")
+    parser.add_argument('--compare', action='store_true', help="also train in memory and compare accuracy")
+    parser.add_argument('--output', help="write the report as JSON")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    args = parser.parse_args(argv)
+
+    params = estimators.default_params('random_forest')
+    load_libraries()
+    baseline_mb = peak_rss_mb()
+    started = time.perf_counter()
+    try:
+        model, stats = train_streaming(args.csv, params, args.memory_mb, args.quiet)
+    except ValueError as e:
+        sys.exit(str(e))
+    stats['seconds'] = time.perf_counter() - started
+    stats['peak_rss_mb'] = peak_rss_mb()
+    stats['memory_used_mb'] = None if baseline_mb is None else stats['peak_rss_mb'] - baseline_mb
+
+    manifest = career_model.model_manifest(args.csv, params, 'random_forest')
+    manifest['hyperparameters'] = {**manifest['hyperparameters'], 'streaming': {'memory_mb': args.memory_mb,
+                                                                                'holdout_every': HOLDOUT_EVERY}}
+    model_path = artifacts.artifact_path(manifest)
+    save_model(model, model_path)
+    artifacts.write_manifest(model_path, manifest)
+
+    report = {'streaming': {**stats, **holdout_accuracy(model, args.csv, stats['chunk_rows'])}}
+    if args.compare:
+        started = time.perf_counter()
+        baseline = train_in_memory(args.csv, params)
+        report['in_memory'] = {'seconds': time.perf_counter() - started, 'peak_rss_mb': peak_rss_mb(),
+                               **holdout_accuracy(baseline, args.csv, stats['chunk_rows'])}
+
+    print(f"{'mode':<10} {'accuracy':>9} {'top-3':>7} {'seconds':>9} {'peak RSS':>10}")
+    for mode, result in report.items():
+        print(f"{mode:<10} {result['accuracy']:>9.3f} {result['top3_accuracy']:>7.3f} {result['seconds']:>9.1f} "
+              f"{result['peak_rss_mb'] or 0:>8.0f}MB")
+    print(f"{stats['chunks']} chunks of {stats['chunk_rows']:,} rows, {stats['trees']} trees of at most "
+          f"{stats['max_leaf_nodes']:,} leaves; saved to {model_path}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if stats['memory_used_mb'] is not None:
+        if stats['memory_used_mb'] > args.memory_mb:
+            sys.exit(f"Over budget: training added {stats['memory_used_mb']:.0f}MB to the process, "
+                     f"budget {args.memory_mb:.0f}MB")
+        print(f"Training added {stats['memory_used_mb']:.0f}MB to the process (budget {args.memory_mb:.0f}MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import career_model
+
+DEFAULT_CHUNKSIZE = 500000
+ID_COLUMN = 'StudentID'
+ID_PREFIX = 'SYN'
+
+# Coefficients of the Abramowitz & Stegun 7.1.26 approximation of erf
+# (absolute error below 1.5e-7), so the normal CDF needs no scipy
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def normal_cdf(z):
+    x = np.abs(z) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + _ERF_P * x)
+    poly = t * (_ERF_A[0] + t * (_ERF_A[1] + t * (_ERF_A[2] + t * (_ERF_A[3] + t * _ERF_A[4]))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+# Cholesky factor of the latent normal correlation behind a Spearman matrix,
+# with the matrix nudged to positive definite if the sample made it singular
+def latent_cholesky(spearman):
+    corr = 2.0 * np.sin(np.pi * np.nan_to_num(spearman) / 6.0)
+    np.fill_diagonal(corr, 1.0)
+    eigenvalues, eigenvectors = np.linalg.eigh(corr)
+    corr = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+    d = np.sqrt(np.diag(corr))
+    return np.linalg.cholesky(corr / np.outer(d, d))
+
+
+# Learn what the generator needs from a real dataset, per career: its share of
+# rows, every numeric column's observed values (sorted, used as the empirical
+# quantile function), their rank correlations (a Gaussian copula) and the
+# frequencies of each categorical value
+def fit(data, target_col=career_model.TARGET_COL, categorical_cols=career_model.CATEGORICAL_COLS):
+    numeric = [col for col in data.columns if col not in [ID_COLUMN, target_col] + categorical_cols]
+    categorical = [col for col in categorical_cols if col in data.columns]
+    careers = data[target_col].value_counts(normalize=True).sort_index()
+    profiles = {}
+    for career in careers.index:
+        group = data[data[target_col] == career]
+        values = group[numeric].to_numpy()
+        profiles[career] = {
+            'sorted': np.sort(values, axis=0),
+            'cholesky': latent_cholesky(group[numeric].rank().corr().to_numpy()),
+            'categorical': {col: group[col].value_counts(normalize=True) for col in categorical},
+        }
+    return {
+        'columns': list(data.columns),
+        'numeric': numeric,
+        'target': target_col,
+        'careers': np.asarray(careers.index, dtype=object),
+        'priors': careers.to_numpy(),
+        'profiles': profiles,
+    }
+
+
+# rows synthetic students for one career: correlated normals from the copula,
+# mapped through that career's empirical quantiles so every column keeps its
+# exact value set and marginal distribution
+def sample_career(profile, rows, rng):
+    sorted_values = profile['sorted']
+    n, d = sorted_values.shape
+    latent = rng.standard_normal((rows, d)) @ profile['cholesky'].T
+    index = np.minimum((normal_cdf(latent) * n).astype(np.intp), n - 1)
+    out = {'numeric': sorted_values[index, np.arange(d)]}
+    for col, freqs in profile['categorical'].items():
+        out[col] = rng.choice(freqs.index.to_numpy(dtype=object), size=rows, p=freqs.to_numpy())
+    return out
+
+
+def student_ids(start, rows, width):
+    return ID_PREFIX + pd.Series(np.arange(start + 1, start + rows + 1)).astype(str).str.zfill(width)
+
+
+# One chunk of rows with the source's columns in the source's order
+def generate_chunk(model, start, rows, rng, id_width):
+    career_idx = rng.choice(len(model['careers']), size=rows, p=model['priors'])
+    numeric = np.empty((rows, len(model['numeric'])), dtype=model['profiles'][model['careers'][0]]['sorted'].dtype)
+    categorical = {}
+    for i, career in enumerate(model['careers']):
+        where = np.flatnonzero(career_idx == i)
+        if not where.size:
+            continue
+        sample = sample_career(model['profiles'][career], len(where), rng)
+        numeric[where] = sample.pop('numeric')
+        for col, values in sample.items():
+            categorical.setdefault(col, np.empty(rows, dtype=object))[where] = values
+
+    chunk = pd.DataFrame(numeric, columns=model['numeric'])
+    for col, values in categorical.items():
+        chunk[col] = values
+    chunk[model['target']] = model['careers'][career_idx]
+    if ID_COLUMN in model['columns']:
+        chunk[ID_COLUMN] = student_ids(start, rows, id_width).to_numpy()
+    return chunk[model['columns']]
+
+
+# Stream rows synthetic students to path in chunks. Each chunk has its own
+# generator spawned from seed, so the output depends only on seed and chunksize.
+# progress(rows_done) is called after each chunk.
+def generate(model, rows, path, seed=0, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    streams = np.random.SeedSequence(seed).spawn(max(1, -(-rows // chunksize)))
+    id_width = max(len(str(rows)), 4)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        for i, start in enumerate(range(0, rows, chunksize)):
+            chunk = generate_chunk(model, start, min(chunksize, rows - start), np.random.default_rng(streams[i]), id_width)
+            chunk.to_csv(f, header=start == 0, index=False)
+            if progress is not None:
+                progress(start + len(chunk))
+    os.replace(tmp_path, path)
+    return path
+
+
+# python synthetic_data.py 10000000 synthetic.csv [--seed 0] [--source waec_subjects_career_dataset.csv]
+# Writes a dataset with the source's exact columns whose per-career score
+# distributions, correlations and categorical frequencies match the source.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic WAEC dataset of any size.")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('output')
+    parser.add_argument('--source', default=career_model.DATA_PATH, help="real dataset to learn from")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows generated and written at a time")
+    parser.add_argument('--quiet', action='store_true', help="don't report progress")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    model = fit(pd.read_csv(args.source))
+
+    def report(rows_done):
+        if not args.quiet:
+            elapsed = time.perf_counter() - started
+            print(f"{rows_done:,} rows in {elapsed:.1f}s ({rows_done / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+    generate(model, args.rows, args.output, args.seed, args.chunksize, report)
+    print(f"Wrote {args.rows:,} rows to {args.output} ({os.path.getsize(args.output) / 1024 ** 2:,.1f}MB) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
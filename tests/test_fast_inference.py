@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import career_model
+from fast_inference import CompiledForest, compile_model
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), career_model.DATA_PATH)
+SAMPLE_ROWS = 3000
+
+
+# A small forest fitted on a sample of the bundled dataset; nothing is written to disk
+@pytest.fixture(scope='module')
+def fitted():
+    data = pd.read_csv(DATA_PATH, nrows=SAMPLE_ROWS)
+    data = data.drop(columns=[col for col in career_model.COLUMNS_TO_DROP if col in data.columns])
+    X, y = data.drop(columns=[career_model.TARGET_COL]), data[career_model.TARGET_COL]
+    model = career_model.build_pipeline(X.columns, {'n_estimators': 25, 'random_state': 0}, 'random_forest')
+    model.fit(X.iloc[:2000], y.iloc[:2000])
+    return model, X.iloc[2000:]
+
+
+def test_classes_and_features_match(fitted):
+    model, _ = fitted
+    compiled = compile_model(model)
+    assert list(compiled.classes_) == list(model.classes_)
+    assert sorted(compiled.feature_names_in_) == sorted(model.feature_names_in_)
+
+
+def test_batch_probabilities_are_identical(fitted):
+    model, X = fitted
+    np.testing.assert_array_equal(compile_model(model).predict_proba(X), model.predict_proba(X))
+
+
+def test_row_probabilities_are_identical(fitted):
+    model, X = fitted
+    compiled = compile_model(model)
+    expected = model.predict_proba(X.iloc[:200])
+    for i, row in enumerate(X.iloc[:200].to_dict('records')):
+        np.testing.assert_array_equal(compiled.predict_proba_row(row), expected[i])
+
+
+def test_unknown_category_is_ignored_like_sklearn(fitted):
+    model, X = fitted
+    row = dict(X.iloc[0].to_dict(), Learning_Style='Unheard-Of')
+    expected = model.predict_proba(pd.DataFrame([row]))[0]
+    np.testing.assert_array_equal(compile_model(model).predict_proba_row(row), expected)
+
+
+def test_compiled_forest_survives_pickling(fitted, tmp_path):
+    import joblib
+
+    model, X = fitted
+    path = tmp_path / 'compiled.pkl'
+    joblib.dump(CompiledForest.from_pipeline(model), path)
+    loaded = joblib.load(path, mmap_mode='r')
+    np.testing.assert_array_equal(loaded.predict_proba(X), model.predict_proba(X))
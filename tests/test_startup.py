@@ -0,0 +1,9 @@
+import benchmark
+
+
+# The serving modules must import within the startup budget and without
+# pulling in training-only packages (see benchmark.py --check-startup)
+def test_serving_imports_are_fast_and_lazy():
+    problems, seconds = benchmark.check_startup(repeat=3)
+    assert not problems, problems
+    assert seconds <= benchmark.STARTUP_BUDGET
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+SCORE_VALUES = np.arange(0, 101)
+
+# Largest grid scored in one call (two subjects at every score: 101 x 101)
+MAX_GRID_ROWS = len(SCORE_VALUES) ** 2
+
+
+# Probability of every career as the given subjects vary over values (every
+# combination when there are two) with the student's other inputs held fixed.
+# The whole grid is scored with a single predict_proba call. Returns one row per
+# grid point: the varied subjects' scores followed by one column per career.
+def sensitivity_grid(student_data, model, subjects, values=SCORE_VALUES):
+    subjects = list(subjects)
+    if not 1 <= len(subjects) <= 2:
+        raise ValueError("Vary one or two subjects")
+    values = np.asarray(values)
+    grids = np.meshgrid(*([values] * len(subjects)), indexing='ij')
+    rows = grids[0].size
+    if rows > MAX_GRID_ROWS:
+        raise ValueError(f"Grid of {rows:,} rows is larger than {MAX_GRID_ROWS:,}")
+
+    columns = list(model.feature_names_in_)
+    X = pd.DataFrame({col: np.full(rows, student_data[col], dtype=object if isinstance(student_data[col], str) else None)
+                      for col in columns})
+    for subject, grid in zip(subjects, grids):
+        X[subject] = grid.ravel()
+
+    probas = model.predict_proba(X)
+    result = pd.DataFrame({subject: grid.ravel() for subject, grid in zip(subjects, grids)})
+    for i, career in enumerate(model.classes_):
+        result[str(career)] = probas[:, i]
+    return result
+
+
+# Careers whose probability ever reaches min_probability anywhere on the grid,
+# most likely first (keeps charts readable)
+def relevant_careers(grid, subjects, min_probability=0.05):
+    peaks = grid.drop(columns=list(subjects)).max().sort_values(ascending=False)
+    return list(peaks[peaks >= min_probability].index) or list(peaks.index[:1])